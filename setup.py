@@ -16,6 +16,9 @@ setup(
         "ffmpeg-python>=0.2.0",
         "qt-material>=2.14",
     ],
+    extras_require={
+        "brotli": ["brotli>=1.0"],  # Brotli-compressed web UI assets
+    },
     entry_points={
         'gui_scripts': [
             'manjcast=manjcast.main:main',
@@ -0,0 +1,188 @@
+"""
+Static asset cache for ManjCast.
+Keeps the web UI files in memory together with precompressed variants.
+"""
+
+import gzip
+import logging
+import mimetypes
+import os
+import threading
+import time
+from email.utils import formatdate
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, gzip is always available
+    brotli = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Content types worth compressing; images are already compressed
+COMPRESSIBLE_TYPES = (
+    'text/',
+    'application/javascript',
+    'application/json',
+    'application/xml',
+    'image/svg+xml',
+)
+
+# Preferred order when the client accepts several encodings equally
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+class StaticAsset:
+    """A cached file with its metadata and compressed variants."""
+
+    __slots__ = ('path', 'content', 'content_type', 'etag', 'mtime',
+                 'last_modified', 'encodings', 'checked_at')
+
+    def __init__(self, path: str, content: bytes, content_type: str, mtime_ns: int):
+        self.path = path
+        self.content = content
+        self.content_type = content_type
+        self.etag = f'"{mtime_ns:x}-{len(content):x}"'
+        self.mtime = mtime_ns / 1e9
+        self.last_modified = formatdate(self.mtime, usegmt=True)
+        self.encodings = {}
+        self.checked_at = time.monotonic()
+
+    def variant(self, encoding: Optional[str]) -> bytes:
+        """Get the body for a content encoding (None for identity)."""
+        return self.encodings[encoding] if encoding else self.content
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        """Get the entity tag of a content encoding (None for identity)."""
+        return f'{self.etag[:-1]}-{encoding}"' if encoding else self.etag
+
+def choose_encoding(accept_encoding: Optional[str], available) -> Optional[str]:
+    """
+    Pick the content encoding to send based on the Accept-Encoding header.
+
+    Args:
+        accept_encoding: Value of the Accept-Encoding header
+        available: Encodings the asset is available in
+
+    Returns:
+        Optional[str]: Chosen encoding, or None for the identity encoding
+    """
+    if not accept_encoding or not available:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in available:
+            weight = weights.get(encoding, weights.get('*', 0.0))
+            if weight > best_weight:
+                best, best_weight = encoding, weight
+    return best
+
+class StaticAssetCache:
+    """
+    In-memory cache of the files under a web root.
+
+    Files are loaded up front and revalidated against their mtime at most
+    once per check interval, so most requests are served without touching
+    the disk.
+    """
+
+    def __init__(self, web_root: str, max_file_size: int = 1024 * 1024,
+                 check_interval: float = 2.0):
+        """
+        Initialize the asset cache.
+
+        Args:
+            web_root: Directory holding the web files
+            max_file_size: Files larger than this are served from disk instead
+            check_interval: Seconds between mtime checks of a cached file
+        """
+        self._web_root = os.path.abspath(web_root)
+        self._max_file_size = max_file_size
+        self._check_interval = check_interval
+        self._assets: Dict[str, StaticAsset] = {}
+        self._lock = threading.Lock()
+
+    def preload(self):
+        """Load every cacheable file under the web root."""
+        count = 0
+        for directory, _, files in os.walk(self._web_root):
+            for name in files:
+                relative = os.path.relpath(os.path.join(directory, name), self._web_root)
+                if self._load(relative.replace(os.sep, '/')):
+                    count += 1
+        logger.info(f"Cached {count} web assets from {self._web_root}")
+
+    def get(self, relative_path: str) -> Optional[StaticAsset]:
+        """
+        Get a cached asset, reloading it if the file changed.
+
+        Args:
+            relative_path: Path relative to the web root, using forward slashes
+
+        Returns:
+            Optional[StaticAsset]: The asset, or None if it is not cacheable
+        """
+        with self._lock:
+            asset = self._assets.get(relative_path)
+        if asset is None:
+            return None
+
+        now = time.monotonic()
+        if now - asset.checked_at < self._check_interval:
+            return asset
+
+        try:
+            mtime = os.stat(asset.path).st_mtime_ns / 1e9
+        except OSError:
+            with self._lock:
+                self._assets.pop(relative_path, None)
+            return None
+
+        if mtime != asset.mtime:
+            return self._load(relative_path)
+        asset.checked_at = now
+        return asset
+
+    def _load(self, relative_path: str) -> Optional[StaticAsset]:
+        """Read a file into the cache with its compressed variants."""
+        full_path = os.path.join(self._web_root, relative_path)
+        try:
+            with open(full_path, 'rb') as f:
+                stat = os.fstat(f.fileno())
+                if stat.st_size > self._max_file_size:
+                    return None
+                content = f.read()
+        except OSError as e:
+            logger.warning(f"Could not cache {relative_path}: {e}")
+            return None
+
+        content_type, _ = mimetypes.guess_type(full_path)
+        asset = StaticAsset(full_path, content, content_type or 'application/octet-stream',
+                            stat.st_mtime_ns)
+
+        if asset.content_type.startswith(COMPRESSIBLE_TYPES):
+            compressed = {'gzip': gzip.compress(content, compresslevel=9, mtime=0)}
+            if brotli:
+                compressed['br'] = brotli.compress(content)
+            # Only keep variants that actually save bytes
+            asset.encodings = {
+                encoding: body for encoding, body in compressed.items()
+                if len(body) < len(content)
+            }
+
+        with self._lock:
+            self._assets[relative_path] = asset
+        return asset
@@ -0,0 +1,62 @@
+"""
+On-disk cache helpers for ManjCast.
+Stores small JSON documents under the user's cache directory.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def get_cache_dir() -> Path:
+    """
+    Get the ManjCast cache directory, creating it if needed.
+
+    Returns:
+        Path: $XDG_CACHE_HOME/manjcast, or ~/.cache/manjcast
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(Path.home(), '.cache')
+    cache_dir = Path(base) / 'manjcast'
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return cache_dir
+
+def load_json(name: str) -> Optional[Any]:
+    """
+    Load a JSON document from the cache directory.
+
+    Args:
+        name: File name inside the cache directory
+
+    Returns:
+        Optional[Any]: The decoded document, or None if missing or unreadable
+    """
+    try:
+        with open(get_cache_dir() / name, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable cache file {name}: {e}")
+        return None
+
+def save_json(name: str, data: Any):
+    """
+    Atomically write a JSON document to the cache directory.
+
+    Args:
+        name: File name inside the cache directory
+        data: JSON-serializable document
+    """
+    try:
+        cache_dir = get_cache_dir()
+        fd, temp_path = tempfile.mkstemp(dir=cache_dir, prefix=f".{name}.")
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(temp_path, cache_dir / name)
+    except OSError as e:
+        logger.warning(f"Failed to write cache file {name}: {e}")
@@ -6,19 +6,39 @@ Integrates device discovery and screen capture functionality to stream to Cast d
 import logging
 import time
 import tempfile
+import threading
 import os
-from typing import Optional, List, Dict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Optional, List, Dict
 from datetime import datetime
+from urllib.parse import urlsplit
 import pychromecast
-from pychromecast.controllers.media import MediaController
+from pychromecast import IDLE_APP_ID
+from pychromecast.controllers.media import MEDIA_PLAYER_STATE_IDLE, MediaController
 
-from .device_discovery import CastDeviceScanner, DeviceDiscoveryError
-from .screen_capture import ScreenCaptureManager, DisplayServer
+from .connection_pool import CastConnectionPool
+from .device_discovery import CastDeviceBrowser, CastDeviceScanner, DeviceDiscoveryError
+from .screen_capture import ScreenCaptureManager, DisplayServer, OutputMode
+from .session_supervisor import SessionSupervisor
+from .stream_buffer import StreamBuffer
 from .stream_server import StreamServer
+from .window_tracker import WindowTracker
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Seconds without an encoder progress report before the encoder counts as stalled
+ENCODER_STALL_TIMEOUT = 10.0
+
+# Seconds to wait for a receiver to start playing
+PLAY_TIMEOUT = 30.0
+
+# Seconds a receiver may go without stream data before it counts as disconnected
+RECEIVER_IDLE_TIMEOUT = 15.0
+
+# Seconds stopping a session waits for the supervisor to finish a recovery
+SUPERVISOR_STOP_TIMEOUT = 1.0
+
 class CastStreamer:
     """
     Manages the streaming of screen capture to Cast devices.
@@ -28,17 +48,43 @@ class CastStreamer:
     def __init__(self, web_root: str = None):
         """Initialize the Cast streamer."""
         self._device_scanner = CastDeviceScanner()
+        self._device_browser = None
+        self._connection_pool = CastConnectionPool()
         self._screen_capture = ScreenCaptureManager()
         self._stream_server = StreamServer(web_root=web_root)
         self._current_device = None
+        self._receivers = {}               # uuid -> Chromecast playing the current stream
+        # Guards the receivers and the selected device against the supervisor thread
+        self._session_lock = threading.Lock()
+        self._media_info = None
         self._current_stream = None
+        self._capture_output = None
+        self._capture_lock = threading.Lock()
+        # Session starts are coordinated on their own thread, so waiting on
+        # their receiver, encoder and server steps can't starve those steps
+        self._session_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cast-session')
+        self._step_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix='cast-session-step')
+        self._start_future = None
+        self._supervisor = None
+        self._server_options = None
+        self._encoder_started = None
+        self._receiver_played = {}         # uuid -> when play_media was last issued
+        self._window_tracker = None
+        self._stream_buffer = None
         self._streaming = False
         self._temp_dir = None
         self._settings = {
             'capture_type': 'fullscreen',  # or 'window'
             'window_id': None,             # Window ID when capture_type is 'window'
+            'monitor': None,               # Monitor name when capture_type is 'fullscreen'
             'receiver_id': 'C0868879',     # Default Cast receiver app ID
+            'output_mode': OutputMode.FMP4.value,  # Serve from memory instead of temp files
+            'adaptive_framerate': False,   # Lower the frame rate on static content
+            'warm_standby': False,         # Keep an encoder running between casts
+            'audio': False,                # Cast desktop audio along with the screen
+            'self_healing': True,          # Restart failed parts of a session automatically
         }
+        self._stream_server.metrics.add_collector(self._collect_encoder_metrics)
         
     def discover_devices(self) -> List[Dict]:
         """
@@ -56,6 +102,66 @@ class CastStreamer:
             logger.error(f"Failed to discover devices: {e}")
             raise
     
+    def cached_devices(self) -> List[Dict]:
+        """
+        Get the devices found in earlier sessions, without scanning.
+        
+        Returns:
+            List[Dict]: Last-known devices, most recently seen first
+        """
+        return self._device_scanner.load_cached_devices()
+    
+    def revalidate_devices(self, devices: List[Dict],
+                           on_result: Callable[[Dict, bool], None]):
+        """
+        Check in the background that cached devices are still reachable.
+        
+        Unreachable devices are evicted from the cache.
+        
+        Args:
+            devices: Cached devices to check
+            on_result: Called on a worker thread with each device and whether it answered
+        """
+        self._device_scanner.revalidate_devices(devices, on_result)
+    
+    def watch_devices(self, on_added: Callable[[Dict], None],
+                      on_updated: Callable[[Dict], None],
+                      on_removed: Callable[[str], None]):
+        """
+        Keep discovering devices in the background and report changes.
+        
+        The callbacks run on the discovery thread.
+        
+        Args:
+            on_added: Called with the device dictionary of a new device
+            on_updated: Called with the device dictionary when a device changes
+            on_removed: Called with the UUID of a device that went away
+        """
+        if self._device_browser:
+            return
+        self._device_browser = CastDeviceBrowser(on_added, on_updated, on_removed)
+        self._device_browser.start()
+    
+    def rescan_devices(self):
+        """Ask the background discovery to query the network right away."""
+        if self._device_browser:
+            self._device_browser.rescan()
+    
+    def stop_watching_devices(self):
+        """Stop the background device discovery."""
+        if self._device_browser:
+            self._device_browser.stop()
+            self._device_browser = None
+    
+    def list_monitors(self) -> List[Dict]:
+        """
+        List the monitors available for fullscreen capture.
+        
+        Returns:
+            List[Dict]: Monitors with name, position, size and primary flag
+        """
+        return self._screen_capture.list_monitors()
+    
     def select_device(self, device_info: Dict) -> bool:
         """
         Select a Cast device for streaming.
@@ -67,55 +173,230 @@ class CastStreamer:
             bool: True if device was selected successfully
         """
         try:
-            # Connect to the selected device
-            chromecasts, browser = pychromecast.get_chromecasts()
-            for cc in chromecasts:
-                if str(cc.device.uuid) == device_info['uuid']:
-                    cc.wait()  # Wait for device to be ready
-                    self._current_device = cc
-                    logger.info(f"Selected device: {cc.device.friendly_name}")
-                    return True
+            cc = self._connect_device(device_info)
+            if not cc:
+                logger.error(f"Device {device_info['name']} not found")
+                return False
             
-            logger.error(f"Device {device_info['name']} not found")
-            return False
+            with self._session_lock:
+                previous = self._current_device
+                if previous is not None and previous is not cc and str(previous.uuid) not in self._receivers:
+                    self._connection_pool.release(str(previous.uuid))
+                self._current_device = cc
+            logger.info(f"Selected device: {cc.name}")
+            return True
             
         except Exception as e:
             logger.error(f"Failed to select device: {e}")
             raise
     
-    def start_streaming(self) -> bool:
+    def _connect_device(self, device_info: Dict):
+        """
+        Connect to a Cast device at its known address, reusing a pooled connection.
+        
+        Args:
+            device_info: Dictionary containing device information
+            
+        Returns:
+            Chromecast: The connected device, or None if it could not be reached
+        """
+        cast_info, zconf = None, None
+        if self._device_browser:
+            # Prefer the live discovery record, which follows address changes
+            cast_info = self._device_browser.get_cast_info(device_info['uuid'])
+            zconf = self._device_browser.zeroconf_instance
+        try:
+            return self._connection_pool.acquire(device_info, cast_info, zconf)
+        except Exception as e:
+            logger.warning(f"Could not connect to {device_info['name']} "
+                           f"at {device_info['ip_address']}: {e}")
+            return None
+    
+    def add_device(self, device_info: Dict) -> bool:
+        """
+        Add a Cast device to the running session.
+        
+        The device plays the same stream as the others, so the screen is
+        captured and encoded only once no matter how many devices watch.
+        
+        Args:
+            device_info: Dictionary containing device information
+            
+        Returns:
+            bool: True if the device joined the session
+        """
+        if not self._streaming:
+            raise RuntimeError("Not streaming")
+        if device_info['uuid'] in self._receivers:
+            return True
+        
+        try:
+            cc = self._connect_device(device_info)
+            if not cc:
+                logger.error(f"Device {device_info['name']} not found")
+                return False
+            if not self._stream_server.can_reach(cc.cast_info.host):
+                logger.error(f"Device {device_info['name']} is on another network than "
+                             "the running stream; restart the cast to include it")
+                return False
+            
+            self._play_on(cc)
+            with self._session_lock:
+                self._receivers[device_info['uuid']] = cc
+            self._watch_receiver(device_info['uuid'])
+            logger.info(f"Added device {cc.name} to the session")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to add device: {e}")
+            raise
+    
+    def remove_device(self, uuid: str):
+        """
+        Remove a Cast device from the running session.
+        
+        Removing the last device stops the session.
+        
+        Args:
+            uuid: UUID of the device to remove
+        """
+        with self._session_lock:
+            cc = self._receivers.pop(uuid, None)
+            selected = cc is self._current_device
+            last = not self._receivers
+        if not cc:
+            return
+        if self._supervisor:
+            self._supervisor.unwatch(f"receiver {uuid}")
+        
+        try:
+            cc.media_controller.stop()
+        except Exception as e:
+            logger.warning(f"Failed to stop playback on {cc.name}: {e}")
+        if not selected:
+            self._connection_pool.release(uuid)
+        logger.info(f"Removed device {cc.name} from the session")
+        
+        if last:
+            self.stop_streaming()
+    
+    def start_streaming(self, device_info: Optional[Dict] = None) -> bool:
         """
         Start streaming screen capture to the selected Cast device.
         
+        Blocks until the receiver plays the stream; use start_streaming_async()
+        to start without waiting.
+        
+        Args:
+            device_info: Device to select and stream to, instead of the selected one
+            
         Returns:
             bool: True if streaming started successfully
         """
-        if not self._current_device:
+        return self.start_streaming_async(device_info).result()
+    
+    def start_streaming_async(self, device_info: Optional[Dict] = None) -> Future:
+        """
+        Start streaming to a Cast device in the background.
+        
+        Connecting to the device happens in the background too. Launching the
+        receiver app, starting the encoder and binding the server then run
+        concurrently. The receiver is pointed at the stream once the encoder
+        has produced its first keyframe group.
+        
+        Args:
+            device_info: Device to select and stream to, instead of the selected one
+            
+        Returns:
+            Future: Resolves to True once the receiver plays the stream, or
+                raises the error that stopped the session from starting
+        """
+        if not device_info and not self._current_device:
             raise RuntimeError("No Cast device selected")
+        if self._start_future and not self._start_future.done():
+            raise RuntimeError("A streaming session is already starting")
         
-        try:
-            # Create temporary directory for stream files if needed
-            if not self._temp_dir:
-                self._temp_dir = tempfile.mkdtemp(prefix="manjcast_")
+        self._start_future = self._session_executor.submit(self._start_session, device_info)
+        return self._start_future
+    
+    def _start_session(self, device_info: Optional[Dict] = None) -> bool:
+        """
+        Set up a streaming session to a device (runs on the session thread).
+        
+        Args:
+            device_info: Device to select first, or None for the selected one
             
-            # Configure capture settings
-            capture_settings = {
-                'capture_type': self._settings['capture_type'],
-                'window_id': self._settings.get('window_id')
-            }
-            self._screen_capture.settings = capture_settings
+        Returns:
+            bool: True if streaming started successfully
+        """
+        if device_info and not self.select_device(device_info):
+            raise RuntimeError(f"Could not connect to {device_info['name']}")
+        cc = self._current_device
+        
+        try:
+            self._configure_capture()
+            app_ready = self._step_executor.submit(self._launch_receiver, cc)
+            capture_ready = None
             
-            # Start screen capture
-            output_file = os.path.join(self._temp_dir, "stream.mp4")
-            self._current_stream = self._screen_capture.start_capture(output_file)
+            # Serve on the interface facing the receiver
+            peer_address = cc.cast_info.host
+            output_mode = OutputMode(self._settings['output_mode'])
+            if output_mode == OutputMode.FMP4:
+                # Keep encoder output in memory and serve it from there
+                self._capture_output = None
+                standby = self._screen_capture.claim_standby()
+                if standby:
+                    self._current_stream, self._stream_buffer = standby
+                    self._encoder_started = time.monotonic()
+                    logger.info("Using warm standby capture")
+                else:
+                    self._stream_buffer = StreamBuffer()
+                    capture_ready = self._step_executor.submit(self._start_capture)
+                server_options = {'stream_buffer': self._stream_buffer}
+                content_path, content_type = '/stream.mp4', 'video/mp4'
+            else:
+                # Create temporary directory for stream files if needed
+                if not self._temp_dir:
+                    self._temp_dir = tempfile.mkdtemp(prefix="manjcast_")
+                
+                if output_mode == OutputMode.HLS:
+                    # Capture into a rolling playlist
+                    self._capture_output = os.path.join(self._temp_dir, "stream.m3u8")
+                    server_options = {'hls_dir': self._temp_dir}
+                    content_path, content_type = '/hls/stream.m3u8', 'application/x-mpegURL'
+                else:
+                    self._capture_output = os.path.join(self._temp_dir, "stream.mp4")
+                    server_options = {'stream_path': self._capture_output}
+                    content_path, content_type = '/stream.mp4', 'video/mp4'
+                capture_ready = self._step_executor.submit(
+                    self._start_capture, self._capture_output
+                )
+            # Kept to bring the server back up on the same sources
+            self._server_options = dict(server_options, peer_address=peer_address)
+            server_ready = self._step_executor.submit(
+                self._stream_server.start, **self._server_options
+            )
             
-            # Start streaming server
-            ip, port = self._stream_server.start(output_file)
+            try:
+                ip, port = server_ready.result()
+                if capture_ready:
+                    capture_ready.result()
+                
+                # Only point the receiver at a stream it can start decoding
+                if output_mode == OutputMode.FMP4:
+                    self._wait_for_first_gop()
+                elif output_mode == OutputMode.HLS:
+                    # The receiver fails on a missing playlist
+                    self._wait_for_file(self._capture_output)
+                app_ready.result()
+            finally:
+                # Let every step settle before a failed start is cleaned up
+                wait([step for step in (app_ready, capture_ready, server_ready) if step])
 
             # Prepare media info with metadata
             media_info = {
-                'contentId': f"http://{ip}:{port}/stream.mp4",
-                'contentType': 'video/mp4',
+                'contentId': f"http://{ip}:{port}{content_path}",
+                'contentType': content_type,
                 'streamType': 'LIVE',
                 'metadata': {
                     'type': 0,  # GENERIC_TYPE
@@ -126,49 +407,171 @@ class CastStreamer:
                 }
             }
 
-            # Initialize media controller with improved settings
-            mc = self._current_device.media_controller
-            mc.play_media(
-                media_info['contentId'],
-                content_type=media_info['contentType'],
-                stream_type=media_info['streamType'],
-                metadata=media_info['metadata'],
-                autoplay=True,
-                current_time=0,
-                title=media_info['metadata']['title']
-            )
-            mc.block_until_active()
-
-            # Set default volume if not set
-            if self._current_device.status.volume_level is None:
-                self._current_device.set_volume(0.5)
+            self._media_info = media_info
+            self._play_on(cc)
+            with self._session_lock:
+                self._receivers[str(cc.uuid)] = cc
+            
+            # Follow the captured window as it moves or resizes
+            if self._settings['capture_type'] == 'window' and self._settings.get('window_id'):
+                self._window_tracker = WindowTracker(
+                    self._settings['window_id'],
+                    self._on_window_geometry_changed
+                )
+                self._window_tracker.start()
             
             self._streaming = True
-            logger.info(f"Started streaming to {self._current_device.device.friendly_name}")
+            self._start_supervisor()
+            logger.info(f"Started streaming to {cc.name}")
             return True
             
         except Exception as e:
             logger.error(f"Failed to start streaming: {e}")
-            self._cleanup_stream()
+            self._abort_start()
             raise
     
+    def _launch_receiver(self, cc):
+        """
+        Launch the media receiver app, so play_media finds it running.
+        
+        Args:
+            cc: Connected Chromecast to launch the app on
+        """
+        cc.start_app(cc.media_controller.supporting_app_id)
+    
+    def _start_capture(self, output_file: Optional[str] = None):
+        """
+        Start the encoder, feeding the stream buffer in fmp4 mode.
+        
+        Args:
+            output_file: Output target in segment modes
+        """
+        process = self._screen_capture.start_capture(output_file)
+        with self._capture_lock:
+            self._current_stream = process
+            self._encoder_started = time.monotonic()
+        if self._stream_buffer:
+            self._stream_buffer.attach(process.stdout)
+    
+    def _abort_start(self):
+        """Stop whatever a failed session start had set up."""
+        with self._capture_lock:
+            if self._current_stream:
+                self._screen_capture.stop_capture(self._current_stream)
+                self._current_stream = None
+        try:
+            self._stream_server.stop()
+        except Exception as e:
+            logger.warning(f"Failed to stop the streaming server: {e}")
+        self._media_info = None
+        self._cleanup_stream()
+    
+    def _play_on(self, cc, supervisor: Optional[SessionSupervisor] = None):
+        """
+        Point a Cast device at the current stream.
+        
+        Args:
+            cc: Connected Chromecast to start playback on
+            supervisor: Supervisor recovering the device, if any; playback
+                is not waited for once it stops
+        """
+        media_info = self._media_info
+        self._receiver_played[str(cc.uuid)] = time.monotonic()
+        
+        # Initialize media controller with improved settings
+        mc = cc.media_controller
+        mc.play_media(
+            media_info['contentId'],
+            content_type=media_info['contentType'],
+            stream_type=media_info['streamType'],
+            metadata=media_info['metadata'],
+            autoplay=True,
+            current_time=0,
+            title=media_info['metadata']['title']
+        )
+        # Wait in short steps, so a stopped supervisor doesn't sit out the timeout
+        deadline = time.monotonic() + PLAY_TIMEOUT
+        while not mc.session_active_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RuntimeError(f"{cc.name} did not start playing the stream")
+            if supervisor and supervisor.stopping:
+                return
+            mc.block_until_active(timeout=min(remaining, 0.5))
+
+        # Set default volume if not set
+        if cc.status.volume_level is None:
+            cc.set_volume(0.5)
+    
+    def prewarm(self):
+        """
+        Start a standby encoder for the next cast, if warm standby is enabled.
+        
+        The standby capture is reused by start_streaming() when the capture
+        settings still match, which cuts the time to the first frame.
+        """
+        if self._streaming or not self._settings['warm_standby']:
+            return
+        if OutputMode(self._settings['output_mode']) != OutputMode.FMP4:
+            logger.warning("Warm standby is only available in fmp4 output mode")
+            return
+        
+        try:
+            self._configure_capture()
+            self._screen_capture.start_standby()
+        except Exception as e:
+            logger.warning(f"Failed to start warm standby: {e}")
+    
+    def _configure_capture(self):
+        """Pass the streamer settings on to the screen capture manager."""
+        capture_settings = {
+            'capture_type': self._settings['capture_type'],
+            'window_id': self._settings.get('window_id'),
+            'monitor': self._settings.get('monitor'),
+            'output_mode': self._settings['output_mode'],
+            'adaptive_framerate': self._settings['adaptive_framerate'],
+            'audio': self._settings['audio']
+        }
+        self._screen_capture.settings = capture_settings
+    
     def stop_streaming(self):
         """Stop the current streaming session."""
         try:
             if self._streaming:
+                # Stop recovering the parts that are being shut down; a recovery
+                # in progress gives up on its own, so don't wait long for it
+                if self._supervisor:
+                    self._supervisor.stop(timeout=SUPERVISOR_STOP_TIMEOUT)
+                    self._supervisor = None
+                
+                # Stop following the captured window
+                if self._window_tracker:
+                    self._window_tracker.stop()
+                    self._window_tracker = None
+                
                 # Stop screen capture
-                if self._current_stream:
-                    self._screen_capture.stop_capture(self._current_stream)
-                    self._current_stream = None
+                with self._capture_lock:
+                    if self._current_stream:
+                        self._screen_capture.stop_capture(self._current_stream)
+                        self._current_stream = None
                 
-                # Stop streaming server
-                if self._stream_server:
-                    self._stream_server.stop()
+                # Stop streaming server; the lock keeps a recovery from restarting it
+                with self._session_lock:
+                    if self._stream_server:
+                        self._stream_server.stop()
+                    receivers = dict(self._receivers)
+                    self._receivers.clear()
                 
-                # Stop media playback
-                if self._current_device:
-                    mc = self._current_device.media_controller
-                    mc.stop()
+                # Stop media playback on every device in the session
+                for uuid, cc in receivers.items():
+                    try:
+                        cc.media_controller.stop()
+                    except Exception as e:
+                        logger.warning(f"Failed to stop playback on {cc.name}: {e}")
+                    # Connections stay open in the pool for the next session
+                    self._connection_pool.release(uuid)
+                self._receiver_played.clear()
+                self._media_info = None
                 
                 self._streaming = False
                 logger.info("Streaming stopped")
@@ -178,9 +581,224 @@ class CastStreamer:
             raise
         finally:
             self._cleanup_stream()
+        
+        # Get the next cast ready
+        self.prewarm()
+    
+    def _on_window_geometry_changed(self, geometry):
+        """Restart the capture on the new window region, keeping the session."""
+        self._restart_capture()
+    
+    def _restart_capture(self):
+        """Replace the capture process while the server and receiver keep running."""
+        with self._capture_lock:
+            if not self._current_stream:
+                return
+            self._current_stream = self._screen_capture.restart_capture(
+                self._current_stream,
+                self._capture_output
+            )
+            self._encoder_started = time.monotonic()
+            if self._stream_buffer:
+                self._stream_buffer.attach(self._current_stream.stdout)
+            logger.info("Screen capture restarted")
+    
+    def _start_supervisor(self):
+        """Watch the encoder, the server and every receiver of the session."""
+        if not self._settings['self_healing']:
+            return
+        supervisor = SessionSupervisor()
+        self._supervisor = supervisor
+        supervisor.watch('encoder', self._check_encoder, self._recover_encoder)
+        supervisor.watch('stream server', self._check_server,
+                         lambda: self._recover_server(supervisor))
+        with self._session_lock:
+            uuids = list(self._receivers)
+        for uuid in uuids:
+            self._watch_receiver(uuid)
+        self._supervisor.start()
+    
+    def _watch_receiver(self, uuid: str):
+        """Start supervising a receiver of the running session."""
+        supervisor = self._supervisor
+        if supervisor:
+            supervisor.watch(
+                f"receiver {uuid}",
+                lambda: self._check_receiver(uuid),
+                lambda: self._recover_receiver(uuid, supervisor)
+            )
+    
+    def _check_encoder(self) -> Optional[str]:
+        """Check that the encoder is running and making progress."""
+        process = self._current_stream
+        if process is None:
+            return "not running"
+        exit_code = process.poll()
+        if exit_code is not None:
+            return f"exited with code {exit_code}"
+        last_report = self._screen_capture.encoder_stats.get('updated', self._encoder_started)
+        if last_report is not None and time.monotonic() - last_report > ENCODER_STALL_TIMEOUT:
+            return f"no progress for {time.monotonic() - last_report:.0f}s"
+        return None
+    
+    def _recover_encoder(self):
+        """Restart the encoder into the same output; receivers keep their connections."""
+        # The display may have changed under the encoder (resolution, X server restart)
+        self._screen_capture.invalidate_display_geometry()
+        self._restart_capture()
+    
+    def _check_server(self) -> Optional[str]:
+        """Check that the stream server is serving."""
+        if not self._stream_server.is_running:
+            return "not running"
+        return None
+    
+    def _recover_server(self, supervisor: SessionSupervisor):
+        """Bring the server back up and point every receiver at its new address."""
+        with self._session_lock:
+            # Don't bring the server back under a session being stopped
+            if supervisor.stopping:
+                return
+            self._stream_server.stop()
+            ip, port = self._stream_server.start(**self._server_options)
+            content_path = urlsplit(self._media_info['contentId']).path
+            self._media_info = dict(self._media_info, contentId=f"http://{ip}:{port}{content_path}")
+            receivers = list(self._receivers.values())
+        for cc in receivers:
+            if supervisor.stopping:
+                return
+            try:
+                self._play_on(cc, supervisor)
+            except Exception as e:
+                # The receiver's own supervision retries it
+                logger.warning(f"Failed to restart playback on {cc.name}: {e}")
+    
+    def _check_receiver(self, uuid: str) -> Optional[str]:
+        """Check that a receiver is connected and playing the stream."""
+        cc = self._receivers.get(uuid)
+        if cc is None:
+            return None
+        if not cc.socket_client.is_alive():
+            return "connection lost"
+        if not cc.socket_client.is_connected:
+            return "reconnecting"
+        if cc.app_id in (None, IDLE_APP_ID):
+            return "cast app closed"
+        status = cc.media_controller.status
+        if status.player_state == MEDIA_PLAYER_STATE_IDLE:
+            return f"playback stopped ({status.idle_reason or 'unknown reason'})"
+        
+        # A receiver that stopped fetching the stream has lost it, whatever it reports
+        idle_time = self._stream_server.stream_idle_time(cc.cast_info.host)
+        played = time.monotonic() - self._receiver_played.get(uuid, 0.0)
+        if idle_time is not None and min(idle_time, played) > RECEIVER_IDLE_TIMEOUT:
+            return f"no stream requests for {idle_time:.0f}s"
+        return None
+    
+    def _recover_receiver(self, uuid: str, supervisor: SessionSupervisor):
+        """Reconnect to a receiver if needed and issue play_media again."""
+        with self._session_lock:
+            cc = self._receivers.get(uuid)
+        if cc is None:
+            return
+        if not cc.socket_client.is_alive():
+            # The socket client gave up reconnecting, so open a new connection
+            device_info = {
+                'uuid': uuid,
+                'name': cc.name,
+                'model': cc.cast_info.model_name,
+                'ip_address': cc.cast_info.host,
+                'port': cc.cast_info.port,
+                'manufacturer': cc.cast_info.manufacturer
+            }
+            self._connection_pool.discard(uuid)
+            new_cc = self._connect_device(device_info)
+            if not new_cc:
+                raise RuntimeError(f"{device_info['name']} is not reachable")
+            with self._session_lock:
+                if self._current_device is cc:
+                    self._current_device = new_cc
+                # The device may have left the session, or the session ended, while connecting
+                if supervisor.stopping or self._receivers.get(uuid) is not cc:
+                    if self._current_device is not new_cc:
+                        self._connection_pool.release(uuid)
+                    return
+                self._receivers[uuid] = cc = new_cc
+        self._play_on(cc, supervisor)
+    
+    def _collect_encoder_metrics(self, registry):
+        """
+        Publish the encoder progress report to the metrics registry.
+        
+        Args:
+            registry: Metrics registry being scraped
+        """
+        process = self._current_stream
+        running = process is not None and process.poll() is None
+        registry.gauge('manjcast_encoder_running', 'Whether the encoder process is running').set(
+            1 if running else 0)
+        if not running:
+            return
+        
+        stats = self._screen_capture.encoder_stats
+        if 'updated' in stats:
+            registry.gauge(
+                'manjcast_encoder_report_age_seconds', 'Seconds since the last encoder progress report'
+            ).set(time.monotonic() - stats['updated'])
+        gauges = {
+            'fps': ('manjcast_encoder_fps', 'Frames encoded per second'),
+            'speed': ('manjcast_encoder_speed', 'Encoding speed as a multiple of real time'),
+            'bitrate_kbps': ('manjcast_encoder_bitrate_kbps', 'Output bitrate in kbit/s'),
+        }
+        counters = {
+            'frame': ('manjcast_encoder_frames_total', 'Frames encoded by the current encoder'),
+            'drop_frames': ('manjcast_encoder_dropped_frames_total', 'Frames dropped by the encoder'),
+            'dup_frames': ('manjcast_encoder_duplicated_frames_total', 'Frames duplicated by the encoder'),
+        }
+        for key, (name, help_text) in gauges.items():
+            if key in stats:
+                registry.gauge(name, help_text).set(stats[key])
+        for key, (name, help_text) in counters.items():
+            if key in stats:
+                registry.counter(name, help_text).set_total(stats[key])
+    
+    def _wait_for_file(self, path: str, timeout: float = 10.0):
+        """
+        Wait until the encoder has written the given output file.
+        
+        Args:
+            path: File to wait for
+            timeout: Maximum time to wait in seconds
+        """
+        deadline = time.monotonic() + timeout
+        while not os.path.exists(path):
+            if self._current_stream and self._current_stream.poll() is not None:
+                raise RuntimeError("FFmpeg exited before producing any output")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Timed out waiting for {os.path.basename(path)}")
+            time.sleep(0.1)
+    
+    def _wait_for_first_gop(self, timeout: float = 10.0):
+        """
+        Wait until the stream buffer holds a keyframe group to start playback from.
+        
+        Args:
+            timeout: Maximum time to wait in seconds
+        """
+        deadline = time.monotonic() + timeout
+        while not self._stream_buffer.wait_until_ready(timeout=0.1):
+            if self._stream_buffer.closed:
+                raise RuntimeError("Stream buffer closed before the first keyframe")
+            if self._current_stream and self._current_stream.poll() is not None:
+                raise RuntimeError("FFmpeg exited before producing any output")
+            if time.monotonic() > deadline:
+                raise RuntimeError("Timed out waiting for the first keyframe")
     
     def _cleanup_stream(self):
         """Clean up temporary streaming resources."""
+        if self._stream_buffer:
+            self._stream_buffer.close()
+            self._stream_buffer = None
         try:
             if self._temp_dir and os.path.exists(self._temp_dir):
                 import shutil
@@ -198,9 +816,15 @@ class CastStreamer:
     def current_device(self) -> Optional[str]:
         """Get the name of the currently selected device."""
         if self._current_device:
-            return self._current_device.device.friendly_name
+            return self._current_device.name
         return None
     
+    @property
+    def active_devices(self) -> List[str]:
+        """Get the UUIDs of the devices playing the current stream."""
+        with self._session_lock:
+            return list(self._receivers)
+    
     @property
     def settings(self) -> dict:
         """Get current streamer settings."""
@@ -213,4 +837,10 @@ class CastStreamer:
     
     def __del__(self):
         """Clean up resources when the object is destroyed."""
-        self.stop_streaming()
\ No newline at end of file
+        self._settings['warm_standby'] = False
+        self.stop_streaming()
+        self._screen_capture.stop_standby()
+        self._connection_pool.close()
+        self.stop_watching_devices()
+        self._session_executor.shutdown(wait=False)
+        self._step_executor.shutdown(wait=False)
\ No newline at end of file
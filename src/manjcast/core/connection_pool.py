@@ -0,0 +1,187 @@
+"""
+Cast connection pool for ManjCast.
+Connects straight to known devices and keeps the connections for reuse across sessions.
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from uuid import UUID
+
+import pychromecast
+import zeroconf
+from pychromecast.models import CastInfo, HostServiceInfo
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class CastConnectionPool:
+    """
+    Pool of connected Chromecast objects, indexed by device UUID.
+
+    Devices are connected directly from the host, port and UUID found by
+    discovery, without browsing the network again. Idle connections stay
+    open, kept alive by the Cast heartbeat, until they expire, the pool is
+    over its size, or the device stops answering.
+    """
+
+    def __init__(self, max_idle: int = 4, idle_timeout: float = 600.0,
+                 check_interval: float = 30.0, connect_timeout: float = 10.0):
+        """
+        Initialize the connection pool.
+
+        Args:
+            max_idle: Maximum number of idle connections kept open
+            idle_timeout: Seconds an unused connection is kept open
+            check_interval: Seconds between health checks of pooled connections
+            connect_timeout: Seconds to wait for a new connection to be ready
+        """
+        self._max_idle = max_idle
+        self._idle_timeout = idle_timeout
+        self._check_interval = check_interval
+        self._connect_timeout = connect_timeout
+        self._entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def acquire(self, device_info: Dict, cast_info: Optional[CastInfo] = None,
+                zconf: Optional[zeroconf.Zeroconf] = None):
+        """
+        Get a connected Chromecast for a device, reusing a pooled connection.
+
+        Args:
+            device_info: Dictionary containing device information
+            cast_info: Cast info from a running discovery, if available
+            zconf: Zeroconf instance of that discovery, needed for mDNS cast info
+
+        Returns:
+            Chromecast: The connected device
+
+        Raises:
+            pychromecast.error.RequestTimeout: If the device does not answer in time
+        """
+        uuid = device_info['uuid']
+        with self._lock:
+            entry = self._entries.get(uuid)
+            if entry and self._is_usable(entry['cast'], device_info['ip_address']):
+                entry['in_use'] = True
+                entry['last_used'] = time.monotonic()
+                logger.debug(f"Reusing connection to {device_info['name']}")
+                return entry['cast']
+            stale = self._entries.pop(uuid, None)
+        if stale:
+            self._disconnect(stale['cast'])
+
+        if cast_info is None:
+            cast_info = self._make_cast_info(device_info)
+        cc = pychromecast.get_chromecast_from_cast_info(
+            cast_info, zconf, tries=3, timeout=self._connect_timeout
+        )
+        try:
+            cc.wait(timeout=self._connect_timeout)
+        except Exception:
+            self._disconnect(cc)
+            raise
+
+        with self._lock:
+            self._entries[uuid] = {'cast': cc, 'in_use': True, 'last_used': time.monotonic()}
+        logger.info(f"Connected to {device_info['name']} at {device_info['ip_address']}")
+        self._start_maintenance()
+        return cc
+
+    def release(self, uuid: str):
+        """
+        Mark a device's connection as idle, keeping it open for reuse.
+
+        Args:
+            uuid: UUID of the device
+        """
+        with self._lock:
+            entry = self._entries.get(uuid)
+            if entry:
+                entry['in_use'] = False
+                entry['last_used'] = time.monotonic()
+
+    def discard(self, uuid: str):
+        """
+        Close and forget a device's connection.
+
+        Args:
+            uuid: UUID of the device
+        """
+        with self._lock:
+            entry = self._entries.pop(uuid, None)
+        if entry:
+            self._disconnect(entry['cast'])
+
+    def close(self):
+        """Close all connections and stop the health checks."""
+        self._stop_event.set()
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+        for entry in entries:
+            self._disconnect(entry['cast'])
+
+    def _start_maintenance(self):
+        """Start the health check thread if it is not running."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._maintain, daemon=True)
+        self._thread.start()
+
+    def _maintain(self):
+        """Evict dead, expired and surplus idle connections until closed."""
+        while not self._stop_event.wait(self._check_interval):
+            now = time.monotonic()
+            evicted = []
+            with self._lock:
+                for uuid, entry in list(self._entries.items()):
+                    idle = not entry['in_use']
+                    expired = idle and now - entry['last_used'] > self._idle_timeout
+                    # A stopped socket client has given up reconnecting
+                    if expired or not entry['cast'].socket_client.is_alive():
+                        evicted.append(self._entries.pop(uuid))
+
+                idle_entries = sorted(
+                    (item for item in self._entries.items() if not item[1]['in_use']),
+                    key=lambda item: item[1]['last_used']
+                )
+                for uuid, _ in idle_entries[:max(len(idle_entries) - self._max_idle, 0)]:
+                    evicted.append(self._entries.pop(uuid))
+
+            for entry in evicted:
+                logger.debug(f"Evicting connection to {entry['cast'].name}")
+                self._disconnect(entry['cast'])
+
+    @staticmethod
+    def _is_usable(cc, host: str) -> bool:
+        """Check that a pooled connection is up and points at the device's current address."""
+        socket_client = cc.socket_client
+        return socket_client.is_alive() and socket_client.is_connected and cc.cast_info.host == host
+
+    @staticmethod
+    def _make_cast_info(device_info: Dict) -> CastInfo:
+        """Build cast info from a device dictionary (cast type is looked up on connect)."""
+        host, port = device_info['ip_address'], device_info.get('port') or 8009
+        return CastInfo(
+            {HostServiceInfo(host, port)},
+            UUID(device_info['uuid']),
+            device_info.get('model'),
+            device_info.get('name'),
+            host,
+            port,
+            None,
+            device_info.get('manufacturer')
+        )
+
+    @staticmethod
+    def _disconnect(cc):
+        """Close a connection without waiting for its thread."""
+        try:
+            cc.socket_client.disconnect()
+        except Exception as e:
+            logger.debug(f"Error disconnecting from {cc.name}: {e}")
@@ -5,67 +5,119 @@ Uses PyChromecast for reliable device discovery.
 
 import socket
 import logging
-from typing import List, Dict
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterator, List, Dict, Optional
 import pychromecast
-from pychromecast.discovery import discover_chromecasts
+import zeroconf
+from pychromecast.discovery import CastBrowser, SimpleCastListener, discover_chromecasts
 from pychromecast.dial import get_device_info
+from pychromecast.models import CastInfo
+
+from .cache import load_json, save_json
 
 logger = logging.getLogger(__name__)
 
+DEVICE_CACHE_FILE = 'devices.json'
+
+# Cached devices not seen for this many seconds are dropped
+DEVICE_CACHE_MAX_AGE = 30 * 24 * 3600
+
+# Device properties kept in the cache
+DEVICE_CACHE_FIELDS = ('uuid', 'name', 'model', 'ip_address', 'port', 'manufacturer')
+
+# Serializes read-modify-write cycles of the cache file
+_device_cache_lock = threading.Lock()
+
 class DeviceDiscoveryError(Exception):
     """Exception raised for errors during device discovery."""
     pass
 
+def load_device_cache() -> List[Dict]:
+    """Load the last-known devices from the cache file.
+    
+    Returns:
+        Cached devices seen within DEVICE_CACHE_MAX_AGE, most recent first
+    """
+    with _device_cache_lock:
+        entries = load_json(DEVICE_CACHE_FILE) or {}
+    if not isinstance(entries, dict):
+        return []
+    
+    oldest = time.time() - DEVICE_CACHE_MAX_AGE
+    devices = [
+        entry for entry in entries.values()
+        if isinstance(entry, dict) and entry.get('last_seen', 0) >= oldest
+        and all(field in entry for field in DEVICE_CACHE_FIELDS)
+    ]
+    devices.sort(key=lambda entry: entry['last_seen'], reverse=True)
+    return [{field: entry[field] for field in DEVICE_CACHE_FIELDS} for entry in devices]
+
+def update_device_cache(seen: List[Dict] = (), evicted: List[str] = ()):
+    """Record seen devices in the cache file and drop evicted ones.
+    
+    Args:
+        seen: Devices that were just found on the network
+        evicted: UUIDs of devices to remove from the cache
+    """
+    with _device_cache_lock:
+        entries = load_json(DEVICE_CACHE_FILE)
+        if not isinstance(entries, dict):
+            entries = {}
+        now = time.time()
+        for device in seen:
+            entry = {field: device.get(field) for field in DEVICE_CACHE_FIELDS}
+            entry['last_seen'] = now
+            entries[device['uuid']] = entry
+        for uuid in evicted:
+            entries.pop(uuid, None)
+        save_json(DEVICE_CACHE_FILE, entries)
+
 class CastDeviceScanner:
     """Handles discovery of Google Cast devices on the network."""
     
-    def __init__(self, timeout: int = 5):
+    def __init__(self, timeout: int = 5, probe_timeout: float = 3.0, max_workers: int = 16):
         """Initialize device discovery.
         
         Args:
             timeout: Discovery timeout in seconds
+            probe_timeout: Timeout in seconds of each device info request attempt
+            max_workers: Maximum number of devices probed or revalidated at the same time
         """
         self.timeout = timeout
+        self.probe_timeout = probe_timeout
+        self.max_workers = max_workers
     
-    def start_discovery(self) -> List[Dict]:
+    def start_discovery(self, on_device: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
         """Find Google Cast devices on the local network.
         
+        Args:
+            on_device: Called with each device as soon as its info arrives
+        
         Returns:
             List of discovered devices with their properties
         """
         try:
             logger.info("Starting device discovery...")
-            devices = []
             
             # Use PyChromecast's discovery mechanism
             chromecasts, browser = pychromecast.discover_chromecasts(timeout=self.timeout)
             
-            for cc in chromecasts:
-                try:
-                    # Get detailed device info
-                    device_info = get_device_info(cc.host)
-                    if device_info:
-                        device = {
-                            'name': cc.device.friendly_name,
-                            'model': device_info.model_name,
-                            'ip_address': cc.host,
-                            'port': cc.port,
-                            'uuid': str(cc.uuid),
-                            'manufacturer': device_info.manufacturer
-                        }
-                        devices.append(device)
-                        logger.info(f"Found device: {device['name']} at {device['ip_address']}")
-                except Exception as e:
-                    logger.warning(f"Error getting device info for {cc.host}: {e}")
-                    continue
-            
-            # Stop discovery browser
+            # Stop discovery browser; the probes only need the addresses
             browser.stop_discovery()
             
+            devices = []
+            for device in self.probe_devices(chromecasts):
+                devices.append(device)
+                if on_device:
+                    on_device(device)
+            
             if not devices:
                 logger.warning("No Cast devices found on the network")
             else:
                 logger.info(f"Found {len(devices)} Cast devices")
+                update_device_cache(seen=devices)
             
             return devices
             
@@ -73,26 +125,311 @@ class CastDeviceScanner:
             logger.error(f"Error during device discovery: {e}")
             raise DeviceDiscoveryError(f"Device discovery failed: {str(e)}")
     
+    def probe_devices(self, cast_infos: List[CastInfo]) -> Iterator[Dict]:
+        """Fetch the device info of discovered casts in parallel.
+        
+        Devices are yielded in the order their answers arrive. Each probe has
+        its own deadline, counted from when it starts, that covers both of
+        its request attempts. Devices that fail, or miss their deadline, are
+        left out.
+        
+        Args:
+            cast_infos: Cast info of the discovered devices
+            
+        Yields:
+            Device dictionaries with their properties
+        """
+        if not cast_infos:
+            return
+        
+        # The SSL attempt and its plain HTTP fallback each get up to probe_timeout
+        deadline = 2 * self.probe_timeout
+        started: Dict[int, float] = {}
+        
+        def probe(index: int, cc: CastInfo):
+            started[index] = time.monotonic()
+            return get_device_info(cc.host, timeout=self.probe_timeout)
+        
+        executor = ThreadPoolExecutor(max_workers=min(len(cast_infos), self.max_workers),
+                                      thread_name_prefix='cast-probe')
+        futures = {
+            executor.submit(probe, index, cc): (index, cc)
+            for index, cc in enumerate(cast_infos)
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                # Wake up for the next answer or the earliest deadline of a running probe
+                now = time.monotonic()
+                expiries = [started[futures[future][0]] + deadline for future in pending
+                            if futures[future][0] in started]
+                timeout = max(min(expiries) - now, 0.05) if expiries else deadline
+                done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    device = self._make_device(futures[future][1], future)
+                    if device:
+                        yield device
+                
+                now = time.monotonic()
+                expired = {future for future in pending
+                           if now - started.get(futures[future][0], now) > deadline}
+                if expired:
+                    hosts = ', '.join(futures[future][1].host for future in expired)
+                    logger.warning(f"No device info before the deadline from: {hosts}")
+                    pending -= expired
+        finally:
+            # Don't wait for probes that missed their deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    @staticmethod
+    def _make_device(cc: CastInfo, future) -> Optional[Dict]:
+        """Build a device dictionary from a finished probe, or None if it failed."""
+        try:
+            device_info = future.result()
+        except Exception as e:
+            logger.warning(f"Error getting device info for {cc.host}: {e}")
+            return None
+        if not device_info:
+            logger.warning(f"No device info from {cc.host}")
+            return None
+        
+        device = {
+            'name': cc.friendly_name or device_info.friendly_name,
+            'model': device_info.model_name,
+            'ip_address': cc.host,
+            'port': cc.port,
+            'uuid': str(cc.uuid),
+            'manufacturer': device_info.manufacturer
+        }
+        logger.info(f"Found device: {device['name']} at {device['ip_address']}")
+        return device
+    
+    def load_cached_devices(self) -> List[Dict]:
+        """Get the devices found in earlier sessions, without touching the network.
+        
+        Returns:
+            Last-known devices, most recently seen first
+        """
+        return load_device_cache()
+    
+    def revalidate_devices(self, devices: List[Dict],
+                           on_result: Callable[[Dict, bool], None]):
+        """Check cached devices in the background, all at once.
+        
+        Devices that answer are marked as seen in the cache; the rest are
+        evicted from it. Returns immediately.
+        
+        Args:
+            devices: Devices to check
+            on_result: Called with each device and whether it is reachable,
+                on a worker thread, as soon as its check finishes
+        """
+        if not devices:
+            return
+        
+        def check(device: Dict) -> bool:
+            reachable = self.verify_device(device['ip_address'], device['port'],
+                                           timeout=self.probe_timeout)
+            if reachable:
+                update_device_cache(seen=[device])
+            else:
+                logger.info(f"Cached device {device['name']} is not reachable, evicting it")
+                update_device_cache(evicted=[device['uuid']])
+            return reachable
+        
+        def report(device: Dict, future):
+            try:
+                on_result(device, future.result())
+            except Exception as e:
+                logger.warning(f"Error revalidating {device['name']}: {e}")
+        
+        executor = ThreadPoolExecutor(max_workers=min(self.max_workers, len(devices)),
+                                      thread_name_prefix='cast-verify')
+        for device in devices:
+            future = executor.submit(check, device)
+            future.add_done_callback(lambda f, device=device: report(device, f))
+        # Worker threads finish the queued checks and exit
+        executor.shutdown(wait=False)
+    
     @staticmethod
-    def verify_device(ip_address: str, port: int = 8009) -> bool:
+    def verify_device(ip_address: str, port: int = 8009, timeout: float = 2.0) -> bool:
         """Verify if a device is reachable and supports Cast protocol.
         
         Args:
             ip_address: Device IP address
             port: Device port (default: 8009)
+            timeout: Connection and request timeout in seconds
             
         Returns:
             True if device is valid and reachable
         """
         try:
             # Try to connect to verify device is reachable
-            sock = socket.create_connection((ip_address, port), timeout=2)
+            sock = socket.create_connection((ip_address, port), timeout=timeout)
             sock.close()
             
             # Get device info to verify it's a Cast device
-            device_info = get_device_info(ip_address)
+            device_info = get_device_info(ip_address, timeout=timeout)
             return device_info is not None
             
         except Exception as e:
             logger.warning(f"Device verification failed for {ip_address}: {e}")
-            return False
\ No newline at end of file
+            return False
+
+def cast_info_to_device(cast_info: CastInfo) -> Dict:
+    """Build a device dictionary from the cast info of a discovered device.
+    
+    Args:
+        cast_info: Cast info reported by the mDNS browser
+        
+    Returns:
+        Device properties in the same form as CastDeviceScanner returns
+    """
+    return {
+        'name': cast_info.friendly_name or cast_info.host,
+        'model': cast_info.model_name,
+        'ip_address': cast_info.host,
+        'port': cast_info.port,
+        'uuid': str(cast_info.uuid),
+        'manufacturer': cast_info.manufacturer
+    }
+
+class CastDeviceBrowser:
+    """Keeps a live table of Cast devices from a long-lived mDNS browser.
+    
+    Unlike CastDeviceScanner, the browser runs for the lifetime of the
+    application and only reports changes. The callbacks are invoked on the
+    zeroconf thread.
+    """
+    
+    def __init__(self, on_added: Optional[Callable[[Dict], None]] = None,
+                 on_updated: Optional[Callable[[Dict], None]] = None,
+                 on_removed: Optional[Callable[[str], None]] = None):
+        """Initialize the device browser.
+        
+        Args:
+            on_added: Called with the device dictionary of a new device
+            on_updated: Called with the device dictionary when a device changes
+            on_removed: Called with the UUID of a device that went away
+        """
+        self._on_added = on_added
+        self._on_updated = on_updated
+        self._on_removed = on_removed
+        self._zeroconf = None
+        self._browser = None
+        self._devices: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Start browsing for devices in the background."""
+        if self._browser:
+            return
+        try:
+            self._zeroconf = zeroconf.Zeroconf()
+            listener = SimpleCastListener(self._device_added, self._device_removed,
+                                          self._device_updated)
+            self._browser = CastBrowser(listener, self._zeroconf)
+            self._browser.start_discovery()
+            logger.info("Started background device discovery")
+        except Exception as e:
+            logger.error(f"Error starting device discovery: {e}")
+            self.stop()
+            raise DeviceDiscoveryError(f"Device discovery failed: {str(e)}")
+    
+    def stop(self):
+        """Stop browsing and release the zeroconf instance."""
+        browser, self._browser = self._browser, None
+        zconf, self._zeroconf = self._zeroconf, None
+        try:
+            if browser:
+                browser.stop_discovery()
+        except Exception as e:
+            logger.warning(f"Error stopping device discovery: {e}")
+        try:
+            # The instance is ours, so release its sockets and threads here
+            if zconf:
+                zconf.close()
+        except Exception as e:
+            logger.warning(f"Error closing zeroconf: {e}")
+    
+    def rescan(self, duration: float = 5.0):
+        """Send fresh mDNS queries now instead of waiting for the next scheduled one.
+        
+        A second, short-lived service browser shares the zeroconf instance and
+        the listener, so answers update the same device table.
+        
+        Args:
+            duration: Seconds to keep the extra browser running
+        """
+        if not self._browser:
+            return
+        extra = zeroconf.ServiceBrowser(self._zeroconf, "_googlecast._tcp.local.",
+                                        self._browser.zeroconf_listener)
+        timer = threading.Timer(duration, extra.cancel)
+        timer.daemon = True
+        timer.start()
+    
+    def get_cast_info(self, uuid: str) -> Optional[CastInfo]:
+        """Get the cast info of a discovered device.
+        
+        Args:
+            uuid: Device UUID
+            
+        Returns:
+            The cast info, or None if the device is not currently known
+        """
+        if not self._browser:
+            return None
+        for device_uuid, cast_info in list(self._browser.devices.items()):
+            if str(device_uuid) == uuid:
+                return cast_info
+        return None
+    
+    @property
+    def devices(self) -> List[Dict]:
+        """Get the devices currently on the network."""
+        with self._lock:
+            return [dict(device) for device in self._devices.values()]
+    
+    @property
+    def zeroconf_instance(self) -> Optional[zeroconf.Zeroconf]:
+        """Get the shared zeroconf instance while browsing."""
+        return self._zeroconf
+    
+    def _device_added(self, uuid, service: str):
+        """Handle a device appearing on the network."""
+        self._store_device(uuid)
+    
+    def _device_updated(self, uuid, service: str):
+        """Handle a change in a known device's services."""
+        self._store_device(uuid)
+    
+    def _device_removed(self, uuid, service: str, cast_info: CastInfo):
+        """Handle a device whose last service went away."""
+        with self._lock:
+            device = self._devices.pop(str(uuid), None)
+        if device:
+            logger.info(f"Device {device['name']} left the network")
+            if self._on_removed:
+                self._on_removed(device['uuid'])
+    
+    def _store_device(self, uuid):
+        """Update the table from the browser and report the change, if any."""
+        cast_info = self._browser.devices.get(uuid) if self._browser else None
+        if not cast_info:
+            return
+        device = cast_info_to_device(cast_info)
+        with self._lock:
+            previous = self._devices.get(device['uuid'])
+            if previous == device:
+                return
+            self._devices[device['uuid']] = device
+        
+        update_device_cache(seen=[device])
+        if previous is None:
+            logger.info(f"Found device: {device['name']} at {device['ip_address']}")
+            if self._on_added:
+                self._on_added(device)
+        elif self._on_updated:
+            self._on_updated(device)
@@ -0,0 +1,138 @@
+"""
+Display geometry module for ManjCast.
+Enumerates X11 monitors with their offsets and caches the layout until outputs change.
+"""
+
+import glob
+import logging
+import re
+import subprocess
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Matches lines of `xrandr --listmonitors`, e.g. " 0: +*DP-1 1920/527x1080/296+0+0  DP-1"
+MONITOR_LINE = re.compile(
+    r'^\s*\d+:\s+\+?(?P<primary>\*?)(?P<name>\S+)\s+'
+    r'(?P<width>\d+)/\d+x(?P<height>\d+)/\d+\+(?P<x>\d+)\+(?P<y>\d+)'
+)
+
+# DRM connector state files that change when outputs are plugged or toggled
+DRM_STATE_FILES = ('status', 'enabled', 'modes')
+
+class DisplayGeometry:
+    """Provides the monitor layout of the X11 screen, cached between output changes."""
+
+    def __init__(self, max_age: float = 60.0):
+        """
+        Initialize the display geometry service.
+
+        Args:
+            max_age: Seconds after which the layout is re-read even if no
+                output change was detected
+        """
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._monitors = None
+        self._signature = None
+        self._loaded_at = 0.0
+
+    def get_monitors(self) -> List[Dict]:
+        """
+        Get the connected monitors.
+
+        Returns:
+            List[Dict]: Monitors with name, x, y, width, height and primary flag
+        """
+        with self._lock:
+            signature = self._get_outputs_signature()
+            expired = time.monotonic() - self._loaded_at > self._max_age
+            if self._monitors is None or signature != self._signature or expired:
+                self._monitors = self._query_monitors()
+                self._signature = signature
+                self._loaded_at = time.monotonic()
+            return [dict(monitor) for monitor in self._monitors]
+
+    def get_monitor(self, name: Optional[str] = None) -> Optional[Dict]:
+        """
+        Get a monitor by name, or the primary monitor.
+
+        Args:
+            name: Output name such as "HDMI-1", or None for the primary monitor
+
+        Returns:
+            Optional[Dict]: The monitor, or None if no monitors were found
+        """
+        monitors = self.get_monitors()
+        if name:
+            for monitor in monitors:
+                if monitor['name'] == name:
+                    return monitor
+            logger.warning(f"Monitor {name} not found, using primary monitor")
+
+        for monitor in monitors:
+            if monitor['primary']:
+                return monitor
+        return monitors[0] if monitors else None
+
+    def get_screen_size(self) -> Optional[Tuple[int, int]]:
+        """
+        Get the size of the virtual screen spanning all monitors.
+
+        Returns:
+            Optional[Tuple[int, int]]: Width and height, or None if no monitors were found
+        """
+        monitors = self.get_monitors()
+        if not monitors:
+            return None
+        width = max(monitor['x'] + monitor['width'] for monitor in monitors)
+        height = max(monitor['y'] + monitor['height'] for monitor in monitors)
+        return width, height
+
+    def invalidate(self):
+        """Force the layout to be re-read on the next request."""
+        with self._lock:
+            self._monitors = None
+
+    def _query_monitors(self) -> List[Dict]:
+        """Read the monitor layout from xrandr."""
+        try:
+            output = subprocess.check_output(['xrandr', '--listmonitors'], text=True)
+        except (subprocess.SubprocessError, FileNotFoundError) as e:
+            logger.warning(f"Could not list monitors: {e}")
+            return []
+
+        monitors = []
+        for line in output.splitlines():
+            match = MONITOR_LINE.match(line)
+            if match:
+                monitors.append({
+                    'name': match.group('name'),
+                    'x': int(match.group('x')),
+                    'y': int(match.group('y')),
+                    'width': int(match.group('width')),
+                    'height': int(match.group('height')),
+                    'primary': bool(match.group('primary'))
+                })
+        logger.debug(f"Detected monitors: {monitors}")
+        return monitors
+
+    def _get_outputs_signature(self) -> Optional[str]:
+        """
+        Get a cheap fingerprint of the connected outputs from the DRM sysfs tree.
+
+        Returns:
+            Optional[str]: Connector state, or None if sysfs is unavailable
+        """
+        parts = []
+        for connector in sorted(glob.glob('/sys/class/drm/card*-*')):
+            for state_file in DRM_STATE_FILES:
+                try:
+                    with open(f"{connector}/{state_file}", 'r') as f:
+                        parts.append(f.read())
+                except OSError:
+                    continue
+        return '|'.join(parts) if parts else None
@@ -0,0 +1,214 @@
+"""
+Encoder calibration module for ManjCast.
+Probes the local FFmpeg and picks the best real-time encoder settings for this machine.
+"""
+
+import logging
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from .cache import load_json, save_json
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+PROFILE_CACHE_FILE = 'encoder_profile.json'
+
+# Candidates ordered from best quality to cheapest
+CALIBRATION_HEIGHTS = [1080, 720]
+CALIBRATION_PRESETS = ['veryfast', 'superfast', 'ultrafast']
+
+class EncoderCalibrator:
+    """Probes FFmpeg capabilities and times synthetic encodes to build an encoder profile."""
+
+    def __init__(self, ffmpeg_path: str, framerate: int = 30, headroom: float = 1.5,
+                 trial_frames: int = 60):
+        """
+        Initialize the calibrator.
+
+        Args:
+            ffmpeg_path: Path to the FFmpeg executable
+            framerate: Target capture frame rate
+            headroom: Required encode speed as a multiple of real time
+            trial_frames: Number of frames encoded per calibration trial
+        """
+        self._ffmpeg_path = ffmpeg_path
+        self._framerate = framerate
+        self._headroom = headroom
+        self._trial_frames = trial_frames
+
+    def load_cached(self) -> Optional[Dict]:
+        """
+        Load the cached profile for this FFmpeg build and CPU, without calibrating.
+
+        Returns:
+            Optional[Dict]: Encoder profile, or None if none was calibrated here yet
+        """
+        profile = load_json(PROFILE_CACHE_FILE)
+        if profile and profile.get('key') == self._get_profile_key():
+            logger.debug("Using cached encoder profile")
+            return profile
+        return None
+
+    def load_or_calibrate(self) -> Dict:
+        """
+        Load the cached profile for this FFmpeg build and CPU, calibrating if needed.
+
+        Returns:
+            Dict: Encoder profile with capabilities and capture settings
+        """
+        profile = self.load_cached()
+        if profile:
+            return profile
+
+        logger.info("Calibrating encoder for this machine...")
+        profile = self.calibrate()
+        profile['key'] = self._get_profile_key()
+        save_json(PROFILE_CACHE_FILE, profile)
+        return profile
+
+    def calibrate(self) -> Dict:
+        """
+        Probe FFmpeg and time encodes until a real-time capable setup is found.
+
+        Returns:
+            Dict: Encoder profile with capabilities and capture settings
+        """
+        encoders = self._probe_list('-encoders')
+        devices = self._probe_list('-devices', flag='D')
+        profile = {
+            'ffmpeg_version': self._get_ffmpeg_version(),
+            'cpu': self._get_cpu_model(),
+            'encoders': encoders,
+            'input_devices': devices,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'settings': {}
+        }
+
+        if 'libx264' not in encoders:
+            logger.warning("FFmpeg has no libx264 encoder, keeping default settings")
+            return profile
+
+        target_fps = self._framerate * self._headroom
+        best_fps = 0.0
+        for height in CALIBRATION_HEIGHTS:
+            for preset in CALIBRATION_PRESETS:
+                for threads in self._get_thread_counts():
+                    fps = self._time_encode(height, preset, threads)
+                    logger.debug(f"Calibration {height}p {preset} threads={threads}: {fps:.1f} fps")
+                    best_fps = max(best_fps, fps)
+                    if fps >= target_fps:
+                        profile['settings'] = {
+                            'preset': preset,
+                            'threads': threads,
+                            'max_height': height
+                        }
+                        logger.info(f"Selected {preset} at up to {height}p ({fps:.0f} fps)")
+                        return profile
+
+        # Nothing keeps up at full rate; lower the frame rate instead of dropping frames
+        framerate = max(int(best_fps / self._headroom), 10)
+        profile['settings'] = {
+            'preset': CALIBRATION_PRESETS[-1],
+            'threads': 0,
+            'max_height': CALIBRATION_HEIGHTS[-1],
+            'framerate': min(framerate, self._framerate)
+        }
+        logger.warning(f"Encoder cannot keep up in real time, capping at {framerate} fps")
+        return profile
+
+    def _time_encode(self, height: int, preset: str, threads: int) -> float:
+        """
+        Encode a synthetic test pattern and measure the achieved frame rate.
+
+        Returns:
+            float: Encoded frames per second, or 0 if the encode failed
+        """
+        width = height * 16 // 9
+        command = [
+            self._ffmpeg_path,
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-f', 'lavfi',
+            '-i', f'testsrc2=size={width}x{height}:rate={self._framerate}',
+            '-frames:v', str(self._trial_frames),
+            '-c:v', 'libx264',
+            '-pix_fmt', 'yuv420p',
+            '-preset', preset,
+            '-tune', 'zerolatency',
+            '-threads', str(threads),
+            '-f', 'null', '-'
+        ]
+        started = time.monotonic()
+        try:
+            subprocess.run(command, check=True, capture_output=True, timeout=30)
+        except (subprocess.SubprocessError, OSError) as e:
+            logger.warning(f"Calibration encode failed: {e}")
+            return 0.0
+        return self._trial_frames / (time.monotonic() - started)
+
+    def _get_thread_counts(self) -> List[int]:
+        """Get the encoder thread counts to try (0 lets x264 decide)."""
+        cpu_count = os.cpu_count() or 1
+        return [0] if cpu_count <= 2 else [0, cpu_count // 2]
+
+    def _probe_list(self, option: str, flag: Optional[str] = None) -> List[str]:
+        """
+        List the names printed by an FFmpeg listing option.
+
+        Args:
+            option: Listing option such as -encoders or -devices
+            flag: Only include entries whose capability flags contain this letter
+
+        Returns:
+            List[str]: Encoder or device names
+        """
+        try:
+            output = subprocess.check_output(
+                [self._ffmpeg_path, '-hide_banner', option],
+                text=True,
+                stderr=subprocess.DEVNULL
+            )
+        except (subprocess.SubprocessError, OSError):
+            return []
+
+        names = []
+        listing = False
+        for line in output.splitlines():
+            if line.strip().startswith('--'):
+                # Entries follow the separator line under the legend
+                listing = True
+                continue
+            parts = line.split()
+            if listing and len(parts) >= 2 and (not flag or flag in parts[0]):
+                names.append(parts[1])
+        return names
+
+    def _get_ffmpeg_version(self) -> str:
+        """Get the FFmpeg version string."""
+        try:
+            output = subprocess.check_output([self._ffmpeg_path, '-version'], text=True)
+            return output.split()[2]
+        except (subprocess.SubprocessError, OSError, IndexError):
+            return 'unknown'
+
+    def _get_cpu_model(self) -> str:
+        """Get a description of the CPU model and core count."""
+        model = platform.processor() or platform.machine()
+        try:
+            with open('/proc/cpuinfo', 'r') as f:
+                for line in f:
+                    if line.startswith('model name'):
+                        model = line.split(':', 1)[1].strip()
+                        break
+        except OSError:
+            pass
+        return f"{model} x{os.cpu_count()}"
+
+    def _get_profile_key(self) -> str:
+        """Get the cache key identifying this FFmpeg build and CPU."""
+        return f"{self._get_ffmpeg_version()}|{self._get_cpu_model()}|{self._framerate}"
@@ -0,0 +1,210 @@
+"""
+Metrics module for ManjCast.
+Minimal thread-safe metrics registry rendered in the Prometheus text format.
+"""
+
+import logging
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Default histogram buckets in seconds, from sub-millisecond writes to stalls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    """Turn a label dict into a hashable, ordered key."""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    """Format labels as {name="value",...}, escaping values."""
+    items = list(key) + ([extra] if extra else [])
+    if not items:
+        return ''
+    parts = []
+    for name, value in items:
+        value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{name}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+def _format_value(value: float) -> str:
+    """Format a sample value."""
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric:
+    """Base class for labelled metrics."""
+
+    metric_type = 'untyped'
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        self._values: Dict[LabelKey, float] = {}
+
+    def remove(self, **labels):
+        """Drop the series with the given labels."""
+        with self._lock:
+            self._values.pop(_label_key(labels), None)
+
+    def render(self) -> List[str]:
+        """Render the metric as exposition lines."""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.metric_type}']
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(key)} {_format_value(value)}')
+        return lines
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    metric_type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        """Increase the counter."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Set the counter from a total tracked elsewhere."""
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    metric_type = 'gauge'
+
+    def set(self, value: float, **labels):
+        """Set the gauge."""
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        """Increase the gauge."""
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        """Decrease the gauge."""
+        self.inc(-amount, **labels)
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets."""
+
+    metric_type = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self._buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: Dict[LabelKey, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        """Record an observation."""
+        key = _label_key(labels)
+        with self._lock:
+            # Bucket counts, then sum and count
+            series = self._series.setdefault(key, [0] * len(self._buckets) + [0.0, 0])
+            for i, bound in enumerate(self._buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def remove(self, **labels):
+        """Drop the series with the given labels."""
+        with self._lock:
+            self._series.pop(_label_key(labels), None)
+
+    def render(self) -> List[str]:
+        """Render the histogram as exposition lines."""
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.metric_type}']
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self._buckets, series):
+                    le = ('le', _format_value(bound))
+                    lines.append(f'{self.name}_bucket{_format_labels(key, le)} {count}')
+                lines.append(f'{self.name}_sum{_format_labels(key)} {_format_value(series[-2])}')
+                lines.append(f'{self.name}_count{_format_labels(key)} {series[-1]}')
+        return lines
+
+class MetricsRegistry:
+    """Holds metrics and renders them for a /metrics scrape."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[['MetricsRegistry'], None]] = []
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        """Get or create a gauge."""
+        return self._register(Gauge, name, help_text)
+
+    def histogram(self, name: str, help_text: str,
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(Histogram, name, help_text, buckets)
+
+    def add_collector(self, collector: Callable[['MetricsRegistry'], None]):
+        """
+        Add a callback that updates metrics right before each scrape.
+
+        Args:
+            collector: Called with the registry; used for values that are
+                cheaper to read on demand, like encoder statistics
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def remove_collector(self, collector: Callable[['MetricsRegistry'], None]):
+        """Remove a collector added with add_collector."""
+        with self._lock:
+            if collector in self._collectors:
+                self._collectors.remove(collector)
+
+    def render(self) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {e}")
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def _register(self, metric_class, name: str, help_text: str, *args) -> Metric:
+        """Return the existing metric of that name or register a new one."""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, help_text, *args)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric {name} already registered as {metric.metric_type}")
+            return metric
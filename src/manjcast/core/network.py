@@ -0,0 +1,129 @@
+"""
+Network interface module for ManjCast.
+Enumerates the local IPv4 interfaces once and picks the address facing a Cast device.
+"""
+
+import fcntl
+import ipaddress
+import json
+import logging
+import socket
+import struct
+import subprocess
+import threading
+from typing import Dict, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# ioctl requests for reading an interface address and netmask (linux/sockios.h)
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891b
+
+class NetworkInterfaces:
+    """Cached view of the local IPv4 interfaces."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._interfaces = None
+
+    def get_interfaces(self) -> List[Dict]:
+        """
+        Get the local IPv4 interfaces, enumerating them on first use.
+
+        Returns:
+            List[Dict]: Interfaces with name, address and network (an IPv4Network)
+        """
+        with self._lock:
+            if self._interfaces is None:
+                self._interfaces = self._query_interfaces()
+                logger.debug(f"Local interfaces: {[(i['name'], i['address']) for i in self._interfaces]}")
+            return list(self._interfaces)
+
+    def invalidate(self):
+        """Force the interfaces to be enumerated again on the next request."""
+        with self._lock:
+            self._interfaces = None
+
+    def address_for(self, peer_address: str) -> Optional[str]:
+        """
+        Get the local address on the same subnet as a peer.
+
+        The interfaces are enumerated again once if no subnet matches, in
+        case an address changed since they were cached.
+
+        Args:
+            peer_address: IPv4 address of the peer, e.g. a Cast device
+
+        Returns:
+            Optional[str]: Local address, or None if no interface is on the peer's subnet
+        """
+        try:
+            peer = ipaddress.IPv4Address(peer_address)
+        except ValueError:
+            logger.warning(f"Not an IPv4 address: {peer_address}")
+            return None
+
+        for attempt in range(2):
+            matches = [i for i in self.get_interfaces() if peer in i['network']]
+            if matches:
+                # The most specific subnet wins
+                best = max(matches, key=lambda i: i['network'].prefixlen)
+                return best['address']
+            if attempt == 0:
+                self.invalidate()
+        return None
+
+    def default_address(self) -> Optional[str]:
+        """
+        Get the address of the first non-loopback interface.
+
+        Returns:
+            Optional[str]: Local address, or None if only loopback is configured
+        """
+        for interface in self.get_interfaces():
+            if not interface['network'].is_loopback:
+                return interface['address']
+        return None
+
+    def _query_interfaces(self) -> List[Dict]:
+        """Enumerate the interfaces with iproute2, falling back to ioctl."""
+        try:
+            output = subprocess.check_output(['ip', '-j', '-4', 'addr', 'show', 'up'],
+                                             text=True, timeout=2)
+            interfaces = []
+            for link in json.loads(output):
+                for addr in link.get('addr_info', []):
+                    if addr.get('family') != 'inet':
+                        continue
+                    interfaces.append(self._make_interface(
+                        link['ifname'], addr['local'], addr['prefixlen']))
+            return interfaces
+        except (subprocess.SubprocessError, OSError, ValueError, KeyError) as e:
+            logger.debug(f"ip addr failed, reading interfaces with ioctl: {e}")
+        return self._query_interfaces_ioctl()
+
+    def _query_interfaces_ioctl(self) -> List[Dict]:
+        """Enumerate the interfaces with SIOCGIFADDR/SIOCGIFNETMASK (one address each)."""
+        interfaces = []
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            for _, name in socket.if_nameindex():
+                request = struct.pack('256s', name.encode()[:15])
+                try:
+                    address = socket.inet_ntoa(fcntl.ioctl(s.fileno(), SIOCGIFADDR, request)[20:24])
+                    netmask = socket.inet_ntoa(fcntl.ioctl(s.fileno(), SIOCGIFNETMASK, request)[20:24])
+                except OSError:
+                    # No IPv4 address on this interface
+                    continue
+                prefixlen = ipaddress.IPv4Network(f'0.0.0.0/{netmask}').prefixlen
+                interfaces.append(self._make_interface(name, address, prefixlen))
+        return interfaces
+
+    @staticmethod
+    def _make_interface(name: str, address: str, prefixlen: int) -> Dict:
+        """Build an interface entry."""
+        return {
+            'name': name,
+            'address': address,
+            'network': ipaddress.IPv4Network(f'{address}/{prefixlen}', strict=False)
+        }
@@ -7,23 +7,47 @@ import logging
 import subprocess
 import shutil
 import os
-from typing import Optional, Dict
+import threading
+import time
+from typing import Optional, Dict, List, Tuple
 from enum import Enum
 
+from .display_geometry import DisplayGeometry
+from .encoder_profile import EncoderCalibrator
+from .stream_buffer import StreamBuffer
+from .window_tracker import Geometry, get_window_geometry
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Layout of the latency stamp: the capture wallclock in milliseconds (modulo
+# 2^32), one black or white square per bit, least significant bit first,
+# along the top-left edge of the encoded frame
+LATENCY_STAMP_BITS = 32
+LATENCY_STAMP_BLOCK = 16
+
 class DisplayServer(Enum):
     """Enum representing the display server type."""
     XORG = "xorg"
     WAYLAND = "wayland"
     UNKNOWN = "unknown"
 
+class OutputMode(Enum):
+    """Enum representing where the encoder writes its output."""
+    SEGMENT = "segment"   # Wrapping segment files on disk
+    FMP4 = "fmp4"         # Fragmented MP4 on the stdout pipe
+    HLS = "hls"           # Rolling HLS playlist with short segments
+
 class ScreenCaptureManager:
     """Manages screen capture functionality with support for different display servers."""
     
-    def __init__(self):
-        """Initialize the screen capture manager."""
+    def __init__(self, auto_tune: bool = True):
+        """
+        Initialize the screen capture manager.
+        
+        Args:
+            auto_tune: Apply the calibrated encoder profile for this machine
+        """
         self._display_server = self._detect_display_server()
         self._ffmpeg_path = shutil.which('ffmpeg')
         if not self._ffmpeg_path:
@@ -32,13 +56,92 @@ class ScreenCaptureManager:
         # Default capture settings
         self._settings = {
             'framerate': 30,
+            'adaptive_framerate': False,   # Drop unchanged frames on static content
+            'min_framerate': 2,            # Lowest frame rate in adaptive mode
             'video_codec': 'libx264',      # Using h264 for Chromecast compatibility
             'pixel_format': 'yuv420p',     # Required for Chromecast
             'preset': 'ultrafast',         # Minimize latency
             'tune': 'zerolatency',        # Optimize for streaming
+            'threads': 0,                  # Encoder threads (0 = automatic)
+            'max_height': None,            # Downscale captures taller than this
             'segment_time': 2,            # Split output into 2-second segments
-            'format': 'mp4'               # Output format
+            'format': 'mp4',              # Output format
+            'output_mode': OutputMode.SEGMENT.value,
+            'keyframe_interval': 2,       # Seconds between keyframes (join points)
+            'fragment_duration': 0.5,     # fmp4 fragment length in seconds (0 = one per GOP)
+            'hls_time': 1,                # HLS segment duration in seconds
+            'hls_list_size': 4,           # Segments listed in the live playlist
+            'capture_type': 'fullscreen', # 'window', or 'synthetic' for a generated test pattern
+            'synthetic_size': '1280x720', # Frame size of the synthetic source
+            'window_id': None,            # Window ID when capture_type is 'window'
+            'monitor': None,              # Monitor to capture in fullscreen mode (None = primary)
+            'audio': False,               # Capture desktop audio into the same stream
+            'audio_source': '@DEFAULT_MONITOR@',  # PulseAudio/PipeWire source to record
+            'audio_codec': 'aac',         # AAC plays on every Cast device
+            'audio_bitrate': '128k',
+            'audio_latency': 0.02,        # Capture fragment length in seconds
+            'latency_stamp': False        # Burn the capture time into each frame (diagnostics)
         }
+        
+        # Cached monitor layout, refreshed when outputs change
+        self._display_geometry = DisplayGeometry()
+        
+        # Output size locked for the lifetime of a window capture session
+        self._output_size = None
+        self._capture_started = None
+        
+        # Pre-spawned capture kept ready for the next cast
+        self._standby = None
+        self._standby_settings = None
+        
+        # Latest progress report of the running encoder
+        self._encoder_stats = {}
+        self._stats_process = None
+        
+        # Encoders and input devices of the local FFmpeg, filled in by auto-tuning
+        self._capabilities = {}
+        
+        # Profile calibrated in the background, applied on the next capture start
+        self._pending_profile = None
+        self._calibration_thread = None
+        if auto_tune:
+            self._apply_encoder_profile()
+
+    def _apply_encoder_profile(self):
+        """Apply the cached encoder profile, or calibrate in the background on first run."""
+        try:
+            calibrator = EncoderCalibrator(self._ffmpeg_path, self._settings['framerate'])
+            profile = calibrator.load_cached()
+        except Exception as e:
+            logger.warning(f"Encoder auto-tuning failed, using defaults: {e}")
+            return
+        
+        if profile:
+            self._use_encoder_profile(profile)
+            return
+        
+        # Calibration can take minutes, so start out with the default settings
+        self._calibration_thread = threading.Thread(
+            target=self._calibrate,
+            args=(calibrator,),
+            daemon=True
+        )
+        self._calibration_thread.start()
+
+    def _calibrate(self, calibrator: EncoderCalibrator):
+        """Calibrate the encoder and keep the profile for the next capture start."""
+        try:
+            self._pending_profile = calibrator.load_or_calibrate()
+        except Exception as e:
+            logger.warning(f"Encoder auto-tuning failed, using defaults: {e}")
+
+    def _use_encoder_profile(self, profile: Dict):
+        """Take over the capabilities and capture settings of an encoder profile."""
+        self._capabilities = {
+            'encoders': profile.get('encoders', []),
+            'input_devices': profile.get('input_devices', [])
+        }
+        self._settings.update(profile.get('settings', {}))
 
     def _detect_display_server(self) -> DisplayServer:
         """
@@ -54,18 +157,38 @@ class ScreenCaptureManager:
             return DisplayServer.XORG
         return DisplayServer.UNKNOWN
 
-    def _get_input_options(self) -> Dict[str, str]:
+    def _get_input_options(self, region: Optional[Geometry] = None) -> Dict[str, str]:
         """
         Get the appropriate FFmpeg input options based on the display server.
         
+        Args:
+            region: Screen region to grab instead of the whole screen (X11 only)
+        
         Returns:
             Dict[str, str]: FFmpeg input options
         """
+        if self._settings['capture_type'] == 'synthetic':
+            # Moving test pattern paced to real time, for headless runs
+            return {
+                'f': 'lavfi',
+                'i': f"testsrc2=size={self._settings['synthetic_size']}"
+                     f":rate={self._settings['framerate']},realtime"
+            }
         if self._display_server == DisplayServer.WAYLAND:
             return {
                 'f': 'pipewire',
                 'framerate': str(self._settings['framerate'])
             }
+        elif region:
+            x, y, width, height = region
+            display = os.environ.get('DISPLAY', ':0.0')
+            return {
+                'f': 'x11grab',
+                'framerate': str(self._settings['framerate']),
+                's': f"{width}x{height}",
+                'draw_mouse': '1',
+                'i': f"{display}+{x},{y}"
+            }
         else:
             return {
                 'f': 'x11grab',
@@ -75,6 +198,41 @@ class ScreenCaptureManager:
                 'i': os.environ.get('DISPLAY', ':0.0')
             }
 
+    def _get_audio_input_options(self) -> Optional[Dict[str, str]]:
+        """
+        Get the FFmpeg input options for desktop audio capture.
+        
+        PipeWire exposes the PulseAudio protocol, so the pulse input covers
+        both sound servers. The default source is the monitor of the default
+        output, i.e. what is currently playing.
+        
+        Returns:
+            Optional[Dict[str, str]]: FFmpeg input options, or None if audio is disabled
+        """
+        if not self._settings['audio']:
+            return None
+        if self._settings['capture_type'] == 'synthetic':
+            return {
+                'f': 'lavfi',
+                'i': 'sine=frequency=440:sample_rate=48000,arealtime'
+            }
+        
+        input_devices = self._capabilities.get('input_devices')
+        if input_devices and 'pulse' not in input_devices:
+            logger.warning("FFmpeg has no pulse input, casting without audio")
+            return None
+        
+        # 48 kHz, 16-bit stereo; small fragments keep capture latency low
+        fragment_size = int(48000 * 2 * 2 * self._settings['audio_latency'])
+        return {
+            'f': 'pulse',
+            'thread_queue_size': '512',
+            'sample_rate': '48000',
+            'channels': '2',
+            'fragment_size': str(fragment_size),
+            'i': self._settings['audio_source']
+        }
+
     def _get_screen_resolution(self) -> str:
         """
         Get the current screen resolution.
@@ -82,62 +240,295 @@ class ScreenCaptureManager:
         Returns:
             str: Screen resolution in the format "WIDTHxHEIGHT"
         """
-        try:
-            if self._display_server == DisplayServer.WAYLAND:
-                # Try using environment variables first
-                width = os.environ.get('WINDOWWIDTH', '1920')
-                height = os.environ.get('WINDOWHEIGHT', '1080')
-                return f"{width}x{height}"
-            else:
-                # Use xrandr for X11
-                output = subprocess.check_output(['xrandr', '--current'], text=True)
-                for line in output.split('\n'):
-                    if '*' in line:  # Current resolution is marked with *
-                        resolution = line.split()[0]
-                        return resolution
-        except (subprocess.SubprocessError, FileNotFoundError, IndexError):
-            logger.warning("Could not detect screen resolution, using default 1920x1080")
+        if self._display_server == DisplayServer.WAYLAND:
+            # Try using environment variables first
+            width = os.environ.get('WINDOWWIDTH', '1920')
+            height = os.environ.get('WINDOWHEIGHT', '1080')
+            return f"{width}x{height}"
+        
+        # Virtual screen spanning all monitors on X11
+        screen_size = self._display_geometry.get_screen_size()
+        if screen_size:
+            return f"{screen_size[0]}x{screen_size[1]}"
         
+        logger.warning("Could not detect screen resolution, using default 1920x1080")
         return "1920x1080"
 
-    def start_capture(self, output_file: str) -> subprocess.Popen:
+    def _get_capture_region(self) -> Optional[Geometry]:
         """
-        Start screen capture and save to the specified output file.
+        Get the screen region to grab: the selected window clipped to the
+        screen, or the selected monitor in fullscreen mode.
+        
+        Returns:
+            Optional[Geometry]: Region to grab, or None to grab the whole screen
+        """
+        if self._settings['capture_type'] == 'synthetic':
+            return None
+        if self._display_server != DisplayServer.XORG:
+            if self._settings['capture_type'] == 'window':
+                logger.warning("Window capture is only supported on Xorg, capturing full screen")
+            return None
+        if self._settings['capture_type'] != 'window' or not self._settings['window_id']:
+            monitor = self._display_geometry.get_monitor(self._settings['monitor'])
+            if not monitor:
+                return None
+            return monitor['x'], monitor['y'], monitor['width'], monitor['height']
+        
+        geometry = get_window_geometry(self._settings['window_id'])
+        if not geometry:
+            logger.warning(f"Could not get geometry of window {self._settings['window_id']}, "
+                           "capturing full screen")
+            return None
+        
+        # x11grab fails on regions outside the screen
+        screen_width, screen_height = map(int, self._get_screen_resolution().split('x'))
+        x, y, width, height = geometry
+        x = min(max(x, 0), screen_width - 2)
+        y = min(max(y, 0), screen_height - 2)
+        width = min(width, screen_width - x)
+        height = min(height, screen_height - y)
+        
+        # H.264 with yuv420p needs even dimensions
+        return x, y, max(width - width % 2, 2), max(height - height % 2, 2)
+
+    def _get_video_filters(self) -> List[str]:
+        """
+        Get the FFmpeg video filter chain.
+        
+        Returns:
+            List[str]: Filters to apply before encoding
+        """
+        filters = []
+        if self._settings['adaptive_framerate']:
+            # Drop frames that barely differ from the previous one, but never
+            # more in a row than the minimum frame rate allows
+            max_dropped = max(self._settings['framerate'] // self._settings['min_framerate'] - 1, 1)
+            filters.append(f'mpdecimate=max={max_dropped}')
+        if self._output_size:
+            # Keep the encoded size fixed when the window is resized
+            width, height = self._output_size
+            filters.append(f'scale={width}:{height}:force_original_aspect_ratio=decrease'
+                           ':force_divisible_by=2')
+            filters.append(f'pad={width}:{height}:(ow-iw)/2:(oh-ih)/2')
+        if self._settings['max_height']:
+            # Stay within what the encoder can handle in real time
+            filters.append(f"scale=-2:'min(ih,{self._settings['max_height']})'")
+        if self._settings['latency_stamp']:
+            filters.append(self._get_latency_stamp_filter())
+        return filters
+
+    @staticmethod
+    def _get_latency_stamp_filter() -> str:
+        """
+        Get the filter graph that burns the capture wallclock into each frame.
+        
+        Frames are timestamped with the wallclock as they enter the filter
+        graph; a strip cropped from the frame is redrawn as a barcode of that
+        time and laid back over it. The stamp is applied after scaling, so
+        its blocks keep their size in the encoded frame.
+        
+        Returns:
+            str: Filter graph segment for the video filter chain
+        """
+        width = LATENCY_STAMP_BITS * LATENCY_STAMP_BLOCK
+        height = LATENCY_STAMP_BLOCK
+        # T is the frame time in seconds, here the wallclock
+        bit = f"mod(floor(T*1000/pow(2,floor(X/{LATENCY_STAMP_BLOCK}))),2)"
+        return (
+            'settb=AVTB,setpts=RTCTIME,split[frame][strip];'
+            f"[strip]crop={width}:{height}:0:0,format=gray,geq=lum='255*{bit}'[stamp];"
+            '[frame][stamp]overlay=0:0,setpts=PTS-STARTPTS'
+        )
+
+    def _get_keyframe_options(self) -> List[str]:
+        """
+        Get the FFmpeg options controlling the keyframe cadence.
+        
+        Returns:
+            List[str]: Keyframe options for the video encoder
+        """
+        output_mode = OutputMode(self._settings['output_mode'])
+        # HLS segments can only be cut on keyframes, so align them
+        if output_mode == OutputMode.HLS:
+            interval = self._settings['hls_time']
+        else:
+            interval = self._settings['keyframe_interval']
+        options = ['-g', str(max(int(self._settings['framerate'] * interval), 1))]
+        
+        if output_mode == OutputMode.HLS or self._settings['adaptive_framerate']:
+            # Force keyframes by time, since dropped frames stretch a frame-based GOP
+            options.extend(['-force_key_frames', f'expr:gte(t,n_forced*{interval})'])
+        return options
+
+    def _get_output_options(self, output_file: Optional[str]) -> List[str]:
+        """
+        Get the FFmpeg muxer options for the configured output mode.
+        
+        Args:
+            output_file: Path where to save the captured video, or the
+                playlist path in hls mode (unused in fmp4 mode)
+            
+        Returns:
+            List[str]: FFmpeg output options, ending with the output target
+        """
+        output_mode = OutputMode(self._settings['output_mode'])
+        if output_mode == OutputMode.HLS:
+            if not output_file:
+                raise ValueError("A playlist path is required in hls mode")
+            hls_time = self._settings['hls_time']
+            segment_pattern = os.path.join(os.path.dirname(output_file), 'segment%05d.ts')
+            return [
+                '-f', 'hls',
+                '-hls_time', str(hls_time),
+                '-hls_list_size', str(self._settings['hls_list_size']),
+                '-hls_flags', 'delete_segments+independent_segments+omit_endlist+temp_file+append_list',
+                '-hls_segment_type', 'mpegts',
+                '-hls_segment_filename', segment_pattern,
+                output_file
+            ]
+
+        if output_mode == OutputMode.FMP4:
+            # Every keyframe starts a fragment and no seekable output is needed
+            options = [
+                '-f', 'mp4',
+                '-movflags', 'frag_keyframe+empty_moov+default_base_moof'
+            ]
+            if self._settings['fragment_duration']:
+                # Also cut the GOP into short fragments, so frames reach
+                # receivers as they are encoded instead of once per GOP
+                duration_us = int(self._settings['fragment_duration'] * 1000000)
+                options.extend(['-frag_duration', str(duration_us)])
+            options.append('pipe:1')
+            return options
+
+        if not output_file:
+            raise ValueError("An output file is required in segment mode")
+        return [
+            '-f', 'segment',                             # Enable segmented output
+            '-segment_time', str(self._settings['segment_time']),
+            '-segment_format', self._settings['format'],
+            '-segment_wrap', '2',                        # Keep only 2 segments
+            output_file
+        ]
+
+    def start_capture(self, output_file: Optional[str] = None) -> subprocess.Popen:
+        """
+        Start screen capture and write it to the configured output.
+        
+        In segment mode the video is saved to output_file. In fmp4 mode the
+        video is written to the process stdout pipe and output_file is ignored.
         
         Args:
             output_file: Path where to save the captured video
             
+        Returns:
+            subprocess.Popen: The FFmpeg process object
+        """
+        profile, self._pending_profile = self._pending_profile, None
+        if profile:
+            logger.info("Applying the calibrated encoder profile")
+            self._use_encoder_profile(profile)
+        
+        region = self._get_capture_region()
+        window_capture = self._settings['capture_type'] == 'window'
+        self._output_size = region[2:] if region and window_capture else None
+        self._capture_started = time.monotonic()
+        return self._spawn_capture(output_file, region)
+
+    def restart_capture(self, process: subprocess.Popen,
+                        output_file: Optional[str] = None) -> subprocess.Popen:
+        """
+        Restart the capture with an updated region, continuing the same stream.
+        
+        The encoded size and timestamps carry on from the previous process,
+        so receivers keep playing across the restart.
+        
+        Args:
+            process: The running FFmpeg process to replace
+            output_file: Same output target that was passed to start_capture
+            
+        Returns:
+            subprocess.Popen: The new FFmpeg process object
+        """
+        if self._capture_started is None:
+            raise RuntimeError("Capture has not been started")
+        
+        self.stop_capture(process)
+        ts_offset = time.monotonic() - self._capture_started
+        return self._spawn_capture(output_file, self._get_capture_region(), ts_offset)
+
+    def _spawn_capture(self, output_file: Optional[str], region: Optional[Geometry],
+                       ts_offset: float = 0.0) -> subprocess.Popen:
+        """
+        Build the FFmpeg command and start the capture process.
+        
+        Args:
+            output_file: Output target for the configured output mode
+            region: Screen region to grab, or None for the whole screen
+            ts_offset: Offset in seconds added to output timestamps
+            
         Returns:
             subprocess.Popen: The FFmpeg process object
         """
         try:
-            input_options = self._get_input_options()
+            input_options = self._get_input_options(region)
+            audio_options = self._get_audio_input_options()
+            if audio_options:
+                # Keep video frames queued while audio is read alongside
+                input_options = {'thread_queue_size': '512', **input_options}
             
             # Start ffmpeg process with appropriate input options
             command = [
                 self._ffmpeg_path,
                 '-hide_banner',
-                '-loglevel', 'error'
+                '-loglevel', 'error',
+                # Machine-readable progress on stderr, once per second
+                '-nostats',
+                '-progress', 'pipe:2',
+                '-stats_period', '1'
             ]
             
             # Add input options
             for key, value in input_options.items():
                 command.extend([f'-{key}', str(value)])
             
+            if audio_options:
+                for key, value in audio_options.items():
+                    command.extend([f'-{key}', str(value)])
+                command.extend([
+                    '-map', '0:v',
+                    '-map', '1:a',
+                    '-c:a', self._settings['audio_codec'],
+                    '-b:a', self._settings['audio_bitrate'],
+                    # Stretch or trim audio to follow its timestamps, so the
+                    # sound card clock cannot drift away from the video
+                    '-af', 'aresample=async=1000:first_pts=0',
+                    # Bound how long the muxer waits to interleave the streams
+                    '-max_interleave_delta', '500000'
+                ])
+            
             # Add output options for Chromecast compatibility
             command.extend([
                 '-c:v', self._settings['video_codec'],
                 '-pix_fmt', self._settings['pixel_format'],
                 '-preset', self._settings['preset'],
                 '-tune', self._settings['tune'],
-                '-g', str(self._settings['framerate'] * 2),  # GOP size = 2 seconds
-                '-r', str(self._settings['framerate']),
-                '-f', 'segment',                             # Enable segmented output
-                '-segment_time', str(self._settings['segment_time']),
-                '-segment_format', self._settings['format'],
-                '-segment_wrap', '2',                        # Keep only 2 segments
-                output_file
+                '-threads', str(self._settings['threads'])
             ])
+            command.extend(self._get_keyframe_options())
+            
+            if self._settings['adaptive_framerate']:
+                # Pass the decimated frames through with their own timestamps
+                command.extend(['-fps_mode', 'vfr'])
+            else:
+                command.extend(['-r', str(self._settings['framerate'])])
+            
+            video_filters = self._get_video_filters()
+            if video_filters:
+                command.extend(['-vf', ','.join(video_filters)])
+            if ts_offset:
+                command.extend(['-output_ts_offset', f'{ts_offset:.3f}'])
+            command.extend(self._get_output_options(output_file))
             
             # Log the command for debugging
             logger.debug(f"FFmpeg command: {' '.join(command)}")
@@ -155,12 +546,61 @@ class ScreenCaptureManager:
                 error = process.stderr.read().decode() if process.stderr else "Unknown error"
                 raise RuntimeError(f"Failed to start FFmpeg: {error}")
             
+            self._stats_process = process
+            self._encoder_stats = {}
+            threading.Thread(
+                target=self._read_encoder_output,
+                args=(process,),
+                daemon=True
+            ).start()
             return process
             
         except Exception as e:
             logger.error(f"Failed to start screen capture: {e}")
             raise
 
+    def _read_encoder_output(self, process: subprocess.Popen):
+        """
+        Parse FFmpeg progress reports from stderr until the process exits.
+        
+        Progress arrives as key=value lines ending with a progress= line;
+        anything else is an FFmpeg error message and is logged.
+        
+        Args:
+            process: The FFmpeg process to read from
+        """
+        report = {}
+        for raw_line in process.stderr:
+            line = raw_line.decode(errors='replace').strip()
+            key, sep, value = line.partition('=')
+            if not sep or ' ' in key:
+                if line:
+                    logger.warning(f"FFmpeg: {line}")
+                continue
+            
+            report[key] = value.strip()
+            if key != 'progress':
+                continue
+            
+            stats = {'updated': time.monotonic()}
+            for name in ('frame', 'fps', 'dup_frames', 'drop_frames', 'total_size'):
+                try:
+                    stats[name] = float(report[name])
+                except (KeyError, ValueError):
+                    pass
+            try:
+                stats['speed'] = float(report.get('speed', '').rstrip('x'))
+            except ValueError:
+                pass
+            try:
+                stats['bitrate_kbps'] = float(report.get('bitrate', '').replace('kbits/s', ''))
+            except ValueError:
+                pass
+            # Ignore late reports from a process that has been replaced
+            if process is self._stats_process:
+                self._encoder_stats = stats
+            report = {}
+
     def stop_capture(self, process: subprocess.Popen):
         """
         Stop the screen capture process.
@@ -176,6 +616,58 @@ class ScreenCaptureManager:
                 process.kill()
             logger.info("Screen capture stopped")
 
+    def start_standby(self, max_bytes: int = 2 * 1024 * 1024):
+        """
+        Pre-spawn a fragmented MP4 capture that keeps the newest GOPs in memory.
+        
+        A later claim_standby() hands it over, so starting a cast does not
+        wait for FFmpeg to start up and produce its first keyframe.
+        
+        Args:
+            max_bytes: Size bound of the standby stream buffer
+        """
+        if self._standby:
+            return
+        if OutputMode(self._settings['output_mode']) != OutputMode.FMP4:
+            raise RuntimeError("Warm standby requires fmp4 output mode")
+        
+        process = self.start_capture()
+        stream_buffer = StreamBuffer(max_bytes=max_bytes)
+        stream_buffer.attach(process.stdout)
+        self._standby = (process, stream_buffer)
+        self._standby_settings = self.settings
+        logger.info("Warm standby capture started")
+
+    def claim_standby(self) -> Optional[Tuple[subprocess.Popen, StreamBuffer]]:
+        """
+        Take over the standby capture if it matches the current settings.
+        
+        Returns:
+            Optional[Tuple[subprocess.Popen, StreamBuffer]]: The running FFmpeg
+            process and its buffer, or None if no usable standby exists
+        """
+        if not self._standby:
+            return None
+        
+        process, stream_buffer = self._standby
+        if process.poll() is not None or self._standby_settings != self._settings:
+            # Settings changed or the process died, so it cannot be reused
+            self.stop_standby()
+            return None
+        
+        self._standby = None
+        self._standby_settings = None
+        return process, stream_buffer
+
+    def stop_standby(self):
+        """Stop the standby capture, if any."""
+        if self._standby:
+            process, stream_buffer = self._standby
+            self._standby = None
+            self._standby_settings = None
+            self.stop_capture(process)
+            stream_buffer.close()
+
     @property
     def settings(self) -> dict:
         """Get current capture settings."""
@@ -191,6 +683,37 @@ class ScreenCaptureManager:
         """
         self._settings.update(new_settings)
         
+    def list_monitors(self) -> List[Dict]:
+        """
+        List the monitors that can be captured.
+        
+        Returns:
+            List[Dict]: Monitors with name, x, y, width, height and primary flag
+        """
+        if self._display_server != DisplayServer.XORG:
+            return []
+        return self._display_geometry.get_monitors()
+
+    def invalidate_display_geometry(self):
+        """Re-read the monitor layout on the next capture start, e.g. after a display change."""
+        self._display_geometry.invalidate()
+
+    @property
+    def encoder_stats(self) -> dict:
+        """
+        Get the latest progress report of the running encoder.
+        
+        Contains frame, fps, dup_frames, drop_frames, total_size, speed and
+        bitrate_kbps when FFmpeg reported them, and the monotonic time of the
+        report as updated. Empty until the first report arrives.
+        """
+        return dict(self._encoder_stats)
+
+    @property
+    def capabilities(self) -> dict:
+        """Get the encoders and input devices supported by the local FFmpeg."""
+        return self._capabilities.copy()
+        
     @property
     def display_server(self) -> DisplayServer:
         """Get the current display server type."""
@@ -0,0 +1,162 @@
+"""
+Session supervisor module for ManjCast.
+Watches the parts of a streaming session and restarts the ones that fail.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class SessionSupervisor:
+    """
+    Polls health checks of session components and recovers failed ones.
+
+    Each component is watched on its own: a failed check runs only that
+    component's recovery. Repeated failures back off exponentially, and the
+    backoff resets once the component has stayed healthy for a while.
+    """
+
+    def __init__(self, interval: float = 2.0, initial_backoff: float = 1.0,
+                 max_backoff: float = 30.0, stable_period: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the session supervisor.
+
+        Args:
+            interval: Seconds between health checks
+            initial_backoff: Seconds to wait before retrying a failed recovery
+            max_backoff: Longest wait between recovery attempts
+            stable_period: Seconds a component must stay healthy to reset its backoff
+            clock: Monotonic time source in seconds
+        """
+        self._interval = interval
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._stable_period = stable_period
+        self._clock = clock
+        self._components: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def watch(self, name: str, check: Callable[[], Optional[str]],
+              recover: Callable[[], None]):
+        """
+        Start watching a component, replacing any component of the same name.
+
+        Args:
+            name: Component name used in log messages
+            check: Returns None while the component is healthy, or why it is not
+            recover: Restarts the component; raises if that failed
+        """
+        with self._lock:
+            self._components[name] = {
+                'check': check,
+                'recover': recover,
+                'attempts': 0,
+                'next_attempt': 0.0,
+                'healthy_since': None
+            }
+
+    def unwatch(self, name: str):
+        """
+        Stop watching a component.
+
+        Args:
+            name: Name the component was watched under
+        """
+        with self._lock:
+            self._components.pop(name, None)
+
+    def start(self):
+        """Start supervising in a background thread."""
+        if self._thread:
+            return
+        # A fresh event, so a thread still finishing a recovery stays stopped
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(self._stop_event,), daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """
+        Stop supervising and forget all components.
+
+        A recovery in progress is expected to notice the stop through
+        stopping and give up; it is not waited for longer than the timeout.
+
+        Args:
+            timeout: Longest time in seconds to wait for the supervisor thread
+        """
+        self._stop_event.set()
+        thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning("Supervisor is still busy with a recovery, not waiting for it")
+        self._thread = None
+        with self._lock:
+            self._components.clear()
+
+    @property
+    def stopping(self) -> bool:
+        """Check whether supervision was stopped, so running recoveries should give up."""
+        return self._stop_event.is_set()
+
+    def _run(self, stop_event: threading.Event):
+        """Check every component until stopped."""
+        while not stop_event.wait(self._interval):
+            self.check_once(stop_event)
+
+    def check_once(self, stop_event: Optional[threading.Event] = None):
+        """
+        Check every component once, recovering the failed ones.
+
+        Args:
+            stop_event: Stops checking the remaining components when set
+        """
+        with self._lock:
+            components = list(self._components.items())
+        for name, component in components:
+            if stop_event and stop_event.is_set():
+                return
+            self._supervise(name, component)
+
+    def _supervise(self, name: str, component: Dict):
+        """Check one component and recover it if it failed."""
+        now = self._clock()
+        try:
+            problem = component['check']()
+        except Exception as e:
+            problem = f"health check failed: {e}"
+
+        if problem is None:
+            if component['healthy_since'] is None:
+                component['healthy_since'] = now
+            elif component['attempts'] and now - component['healthy_since'] >= self._stable_period:
+                logger.info(f"{name} is stable again")
+                component['attempts'] = 0
+            return
+
+        component['healthy_since'] = None
+        if now < component['next_attempt']:
+            return
+
+        component['attempts'] += 1
+        backoff = min(self._initial_backoff * 2 ** (component['attempts'] - 1), self._max_backoff)
+        component['next_attempt'] = now + backoff
+        logger.warning(f"{name} failed ({problem}), recovering "
+                       f"(attempt {component['attempts']})")
+        try:
+            component['recover']()
+        except Exception as e:
+            logger.error(f"Failed to recover {name}, retrying in {backoff:.0f}s: {e}")
+
+    @property
+    def failures(self) -> Dict[str, int]:
+        """Get the recovery attempts since each component was last stable."""
+        with self._lock:
+            return {name: component['attempts'] for name, component in self._components.items()}
@@ -0,0 +1,473 @@
+"""
+In-memory stream buffer for ManjCast.
+Keeps the fragmented MP4 output of the encoder in a bounded ring so it can be
+served to Cast devices without temporary files.
+"""
+
+import logging
+import struct
+import threading
+import time
+from collections import deque
+from typing import BinaryIO, Iterator, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Top-level boxes that make up the initialization segment
+INIT_BOX_TYPES = (b'ftyp', b'moov')
+
+def read_box(stream: BinaryIO) -> Optional[Tuple[bytes, bytes]]:
+    """
+    Read one complete top-level MP4 box from a stream.
+
+    Args:
+        stream: Binary stream positioned at the start of a box
+
+    Returns:
+        Optional[Tuple[bytes, bytes]]: Box type and the raw box bytes, or None at end of stream
+    """
+    header = _read_exact(stream, 8)
+    if not header:
+        return None
+
+    size, box_type = struct.unpack('>I4s', header)
+    if size == 1:
+        # 64-bit box size follows the type
+        large_size = _read_exact(stream, 8)
+        if not large_size:
+            return None
+        header += large_size
+        size = struct.unpack('>Q', large_size)[0]
+
+    if size == 0:
+        # Box extends to the end of the stream
+        return box_type, header + stream.read()
+
+    if size < len(header):
+        raise ValueError(f"Invalid MP4 box size {size} for {box_type!r}")
+
+    payload = _read_exact(stream, size - len(header))
+    if payload is None:
+        return None
+    return box_type, header + payload
+
+def iter_boxes(data: bytes, offset: int = 0, end: Optional[int] = None) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    Iterate over the MP4 boxes contained in a byte range.
+
+    Args:
+        data: Buffer holding the boxes
+        offset: Start of the first box
+        end: End of the range (default: end of data)
+
+    Yields:
+        Tuple[bytes, int, int]: Box type, payload start and box end
+    """
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, box_type = struct.unpack_from('>I4s', data, offset)
+        header = 8
+        if size == 1:
+            size = struct.unpack_from('>Q', data, offset + 8)[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header or offset + size > end:
+            return
+        yield box_type, offset + header, offset + size
+        offset += size
+
+def is_keyframe_fragment(data: bytes) -> bool:
+    """
+    Check whether a moof/mdat fragment starts with a sync sample in every track.
+
+    Args:
+        data: Raw fragment bytes
+
+    Returns:
+        bool: True if a decoder can start at this fragment
+    """
+    for box_type, start, end in iter_boxes(data):
+        if box_type != b'moof':
+            continue
+        for traf_type, traf_start, traf_end in iter_boxes(data, start, end):
+            if traf_type == b'traf' and not _traf_starts_with_sync(data, traf_start, traf_end):
+                return False
+        return True
+    return False
+
+def _traf_starts_with_sync(data: bytes, start: int, end: int) -> bool:
+    """Check the first sample flags of a track fragment."""
+    default_flags = None
+    for box_type, payload, _ in iter_boxes(data, start, end):
+        flags = struct.unpack_from('>I', data, payload)[0] & 0xFFFFFF
+        if box_type == b'tfhd':
+            # Skip track_ID and the optional fields preceding default_sample_flags
+            offset = payload + 8
+            offset += 8 if flags & 0x01 else 0
+            offset += 4 if flags & 0x02 else 0
+            offset += 4 if flags & 0x08 else 0
+            offset += 4 if flags & 0x10 else 0
+            if flags & 0x20:
+                default_flags = struct.unpack_from('>I', data, offset)[0]
+        elif box_type == b'trun':
+            offset = payload + 8
+            offset += 4 if flags & 0x01 else 0
+            if flags & 0x04:
+                sample_flags = struct.unpack_from('>I', data, offset)[0]
+            elif flags & 0x400:
+                # Flags of the first sample entry, after its duration and size
+                offset += 4 if flags & 0x100 else 0
+                offset += 4 if flags & 0x200 else 0
+                sample_flags = struct.unpack_from('>I', data, offset)[0]
+            else:
+                sample_flags = default_flags
+            # Without explicit flags the track defaults from moov apply; assume sync
+            return sample_flags is None or not sample_flags & 0x00010000
+    return True
+
+def _read_exact(stream: BinaryIO, size: int) -> Optional[bytes]:
+    """Read exactly size bytes from a stream, or None if it ends first."""
+    data = b''
+    while len(data) < size:
+        chunk = stream.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+class StreamFragment:
+    """A single moof/mdat fragment held by the stream buffer."""
+
+    __slots__ = ('sequence', 'data', 'timestamp', 'keyframe')
+
+    def __init__(self, sequence: int, data: bytes):
+        self.sequence = sequence
+        self.data = data
+        self.timestamp = time.monotonic()
+        try:
+            self.keyframe = is_keyframe_fragment(data)
+        except struct.error:
+            self.keyframe = False
+
+class StreamReader:
+    """
+    A single client's position in the stream buffer.
+
+    The fragments between the reader and the head of the buffer form the
+    client's send queue. When the next fragment is older than max_lag, the
+    reader jumps forward to the newest keyframe, so a slow client falls
+    behind live by a bounded amount and never holds data in memory.
+    """
+
+    def __init__(self, stream_buffer: 'StreamBuffer', max_lag: float,
+                 stop_event: Optional[threading.Event], poll_interval: float,
+                 client: str):
+        self._buffer = stream_buffer
+        self._max_lag = max_lag
+        self._stop_event = stop_event
+        self._poll_interval = poll_interval
+        self._client = client
+        self.skips = 0
+        # Monotonic time the last yielded fragment was received from the encoder
+        self.fragment_timestamp = None
+
+    def __iter__(self) -> Iterator[bytes]:
+        """
+        Iterate over the live stream starting at the newest keyframe.
+
+        Yields:
+            bytes: The initialization segment, then fragments as they arrive
+        """
+        stream_buffer = self._buffer
+        stop_event = self._stop_event
+        sequence = None
+        generation = None
+        while True:
+            if stop_event and stop_event.is_set():
+                return
+            read = stream_buffer.read_fragment(sequence, self._max_lag, self._poll_interval,
+                                               generation)
+            if stream_buffer.closed or (stop_event and stop_event.is_set()):
+                return
+            if read is None:
+                continue
+
+            fragment = read.fragment
+            if read.skipped:
+                self.skips += 1
+                logger.warning(
+                    f"Client {self._client} is "
+                    f"{'out of the buffer' if read.lag is None else f'{read.lag:.1f}s behind'}, "
+                    f"skipping {read.skipped} fragments to the latest keyframe"
+                )
+            if read.init_segment is not None:
+                if generation is not None:
+                    logger.info(f"Stream format changed, sending the new init segment "
+                                f"to client {self._client}")
+                generation = read.generation
+                self.fragment_timestamp = None
+                yield read.init_segment
+            self.fragment_timestamp = fragment.timestamp
+            yield fragment.data
+            sequence = fragment.sequence + 1
+
+class FragmentRead:
+    """The next piece of the stream for a reader, as handed out by the stream buffer."""
+
+    __slots__ = ('init_segment', 'fragment', 'skipped', 'lag', 'generation')
+
+    def __init__(self, init_segment: Optional[bytes], fragment: StreamFragment,
+                 skipped: int = 0, lag: Optional[float] = None, generation: int = 0):
+        self.init_segment = init_segment  # Sent first to readers that (re)join
+        self.fragment = fragment
+        self.skipped = skipped            # Fragments dropped to catch up with live
+        self.lag = lag                    # Seconds behind live, None if out of the buffer
+        self.generation = generation      # Init segment generation the fragment belongs to
+
+class StreamBuffer:
+    """
+    Bounded in-memory ring of fragmented MP4 data.
+
+    The encoder writes fragmented MP4 to its stdout pipe; a pump thread splits
+    it into the initialization segment and moof/mdat fragments. Readers start
+    with the initialization segment followed by the newest keyframe fragment.
+
+    The newest keyframe group is never evicted, so a joining reader can
+    always be given a complete GOP up to the live edge, even when that GOP
+    alone is larger than the size bound.
+    """
+
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        """
+        Initialize the stream buffer.
+
+        Args:
+            max_bytes: Maximum number of fragment bytes kept in memory
+        """
+        self._max_bytes = max_bytes
+        self._condition = threading.Condition()
+        self._fragments = deque()
+        self._size = 0
+        self._next_sequence = 0
+        self._keyframe = None
+        self._init_segment = None
+        self._init_generation = 0          # Bumped whenever the init segment changes
+        self._closed = False
+        self._pump_thread = None
+        self._skip_count = 0
+
+    def attach(self, stream: BinaryIO):
+        """
+        Start pumping fragmented MP4 data from a stream into the buffer.
+
+        A buffer can be re-attached to a restarted encoder. An identical init
+        segment is dropped in favour of the one readers already received; a
+        different one (e.g. after a resolution change) replaces it for the
+        readers that connect from then on.
+
+        Args:
+            stream: Readable binary stream, typically the FFmpeg stdout pipe
+        """
+        self._pump_thread = threading.Thread(
+            target=self._pump,
+            args=(stream,),
+            daemon=True
+        )
+        self._pump_thread.start()
+
+    def _pump(self, stream: BinaryIO):
+        """Split the incoming stream into init segment and fragments."""
+        init_boxes = []
+        pending = []
+        try:
+            while not self._closed:
+                box = read_box(stream)
+                if box is None:
+                    break
+                box_type, data = box
+
+                if box_type in INIT_BOX_TYPES:
+                    init_boxes.append(data)
+                    if box_type == b'moov':
+                        init_segment = b''.join(init_boxes)
+                        if self._init_segment is None:
+                            self.set_init_segment(init_segment)
+                        elif init_segment != self._init_segment:
+                            logger.info("Encoder output format changed, replacing init segment")
+                            self._replace_init_segment(init_segment)
+                        init_boxes = []
+                elif box_type == b'mdat' and pending:
+                    pending.append(data)
+                    self.append(b''.join(pending))
+                    pending = []
+                else:
+                    # moof and any boxes preceding it (styp, sidx, prft)
+                    pending.append(data)
+        except (OSError, ValueError) as e:
+            logger.error(f"Stream buffer pump failed: {e}")
+        logger.debug("Stream buffer input ended")
+
+    def set_init_segment(self, data: bytes):
+        """
+        Set the initialization segment (ftyp + moov).
+
+        Args:
+            data: Raw initialization segment bytes
+        """
+        with self._condition:
+            self._init_segment = data
+            self._init_generation += 1
+            self._condition.notify_all()
+
+    def _replace_init_segment(self, data: bytes):
+        """Switch to a new output format, dropping the fragments of the old one."""
+        with self._condition:
+            self._init_segment = data
+            self._init_generation += 1
+            self._fragments.clear()
+            self._keyframe = None
+            self._size = 0
+            self._condition.notify_all()
+
+    def append(self, data: bytes):
+        """
+        Append a complete fragment, evicting the oldest ones past the size bound.
+
+        Args:
+            data: Raw fragment bytes (moof + mdat)
+        """
+        with self._condition:
+            fragment = StreamFragment(self._next_sequence, data)
+            self._fragments.append(fragment)
+            self._next_sequence += 1
+            self._size += len(data)
+            if fragment.keyframe:
+                self._keyframe = fragment
+            # Evict older fragments, but keep the newest GOP from its keyframe on
+            while (self._size > self._max_bytes and len(self._fragments) > 1
+                   and self._fragments[0] is not self._keyframe):
+                self._size -= len(self._fragments.popleft().data)
+            self._condition.notify_all()
+
+    def iter_stream(self, stop_event: Optional[threading.Event] = None,
+                    poll_interval: float = 0.5, max_lag: float = 3.0,
+                    client: str = 'unknown') -> StreamReader:
+        """
+        Create a reader for the live stream starting at the newest keyframe.
+
+        Args:
+            stop_event: Optional event that ends the iteration when set
+            poll_interval: How often to check the stop event while waiting
+            max_lag: Seconds a client may fall behind before skipping ahead
+            client: Client name used in log messages
+
+        Returns:
+            StreamReader: Iterable yielding the init segment, then fragments
+        """
+        return StreamReader(self, max_lag, stop_event, poll_interval, client)
+
+    def read_fragment(self, sequence: Optional[int], max_lag: float,
+                      timeout: Optional[float] = None,
+                      generation: Optional[int] = None) -> Optional[FragmentRead]:
+        """
+        Wait for the next fragment to send a reader.
+
+        A new reader gets the initialization segment and the newest keyframe
+        fragment, and so does a reader whose init segment has since been
+        replaced by a new output format. A reader whose next fragment is
+        older than max_lag, or has already been evicted, is skipped ahead to
+        the newest keyframe.
+
+        Args:
+            sequence: Sequence number the reader needs next, or None for a new reader
+            max_lag: Seconds a reader may fall behind live before it is skipped ahead
+            timeout: Maximum time to wait in seconds, or None to wait indefinitely
+            generation: Generation of the init segment the reader was sent, if any
+
+        Returns:
+            Optional[FragmentRead]: What to send next, or None on timeout or when closed
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._closed or self._can_serve(sequence, generation), timeout
+            )
+            if self._closed or not self._can_serve(sequence, generation):
+                return None
+
+            if self._needs_init_segment(sequence, generation):
+                # Readers join on a keyframe, never mid-GOP
+                return FragmentRead(self._init_segment, self._latest_keyframe(),
+                                    generation=self._init_generation)
+
+            oldest = self._fragments[0].sequence
+            fragment = self._fragments[sequence - oldest] if sequence >= oldest else None
+            lag = time.monotonic() - fragment.timestamp if fragment else None
+            if fragment is None or lag > max_lag:
+                # Too far behind live: drop the backlog up to the newest keyframe
+                target = self._latest_keyframe()
+                if target.sequence > sequence:
+                    self._skip_count += 1
+                    return FragmentRead(None, target, target.sequence - sequence, lag,
+                                        self._init_generation)
+            return FragmentRead(None, fragment, lag=lag, generation=self._init_generation)
+
+    def _needs_init_segment(self, sequence: Optional[int], generation: Optional[int]) -> bool:
+        """Check if a reader must (re)start from the init segment (call with the lock held)."""
+        return sequence is None or (generation is not None and generation != self._init_generation)
+
+    def _can_serve(self, sequence: Optional[int], generation: Optional[int] = None) -> bool:
+        """Check if a reader at the given position has something to read (call with the lock held)."""
+        if self._init_segment is None or not self._fragments:
+            return False
+        if self._needs_init_segment(sequence, generation):
+            return self._keyframe is not None
+        return sequence < self._next_sequence
+
+    def _latest_keyframe(self) -> StreamFragment:
+        """Get the newest fragment a decoder can start at (call with the lock held)."""
+        return self._keyframe or self._fragments[-1]
+
+    def close(self):
+        """Close the buffer and wake up all readers."""
+        with self._condition:
+            self._closed = True
+            self._fragments.clear()
+            self._keyframe = None
+            self._size = 0
+            self._condition.notify_all()
+
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the buffer holds an init segment and a keyframe to start from.
+
+        Args:
+            timeout: Maximum time to wait in seconds, or None to wait indefinitely
+
+        Returns:
+            bool: True if the buffer is ready, False on timeout or when closed
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._closed or (self._init_segment is not None
+                                         and self._keyframe is not None),
+                timeout
+            )
+            return not self._closed and self._init_segment is not None and self._keyframe is not None
+
+    @property
+    def is_ready(self) -> bool:
+        """Check if the buffer holds an init segment and a keyframe to start from."""
+        with self._condition:
+            return self._init_segment is not None and self._keyframe is not None
+
+    @property
+    def skip_count(self) -> int:
+        """Get how many times a lagging client was skipped ahead to a keyframe."""
+        return self._skip_count
+
+    @property
+    def closed(self) -> bool:
+        """Check if the buffer has been closed."""
+        return self._closed
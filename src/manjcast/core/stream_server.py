@@ -6,32 +6,132 @@ Handles video streaming to Cast devices using HTTP protocol.
 import logging
 import threading
 import os
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import socket
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 import mimetypes
 
+from .asset_cache import StaticAsset, StaticAssetCache, choose_encoding
+from .metrics import MetricsRegistry
+from .network import NetworkInterfaces
+from .stream_buffer import StreamBuffer
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# URL prefix for HLS playlist and segment routes
+HLS_PREFIX = '/hls/'
+
+# HLS content types and cache policies. The playlist changes with every
+# segment, while segments are immutable once listed.
+HLS_FILE_TYPES = {
+    '.m3u8': ('application/vnd.apple.mpegurl', 'no-cache, no-store'),
+    '.ts': ('video/mp2t', 'public, max-age=60'),
+}
+
+# Content type of the Prometheus text exposition format
+METRICS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Histogram buckets for how old media is when it goes out, in seconds
+SEGMENT_AGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 30.0)
+
+class RangeNotSatisfiable(Exception):
+    """Raised when a requested byte range lies outside the file."""
+    pass
+
+def parse_byte_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP Range header.
+    
+    Args:
+        header: Value of the Range header, e.g. "bytes=0-1023"
+        size: Size of the file in bytes
+        
+    Returns:
+        Optional[Tuple[int, int]]: First and last byte (inclusive), or None if
+        the header is not a single byte range and should be ignored
+        
+    Raises:
+        RangeNotSatisfiable: If the range does not overlap the file
+    """
+    unit, _, ranges = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in ranges:
+        return None
+    
+    start, sep, end = ranges.strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if not start:
+            # Suffix range: the last N bytes
+            length = int(end)
+            if length <= 0 or size == 0:
+                # Nothing to send, not even from an empty file
+                raise RangeNotSatisfiable()
+            return max(size - length, 0), size - 1
+        first = int(start)
+        last = int(end) if end else size - 1
+    except ValueError:
+        return None
+    
+    if first >= size or last < first:
+        raise RangeNotSatisfiable()
+    return first, min(last, size - 1)
+
 class StreamRequestHandler(BaseHTTPRequestHandler):
-    """Handles HTTP requests for video streaming and static files."""
+    """
+    Handles HTTP requests for video streaming and static files.
+    
+    Connections are persistent (HTTP/1.1): every response carries a
+    Content-Length or is sent with chunked transfer encoding, so receivers
+    polling playlists and segments, and the sender page loading its assets,
+    reuse one connection. Pipelined requests are answered in order.
+    """
+    
+    protocol_version = 'HTTP/1.1'
     
-    def __init__(self, *args, **kwargs):
-        self.stream_path = None
-        self.web_root = None
-        super().__init__(*args, **kwargs)
+    def setup(self):
+        """Apply the idle timeout and count the connection as active."""
+        # Idle keep-alive connections are closed after this many seconds
+        self.timeout = self.server.keep_alive_timeout
+        super().setup()
+        self.server.active_connections.inc()
+    
+    def finish(self):
+        """Count the connection as closed."""
+        self.server.active_connections.dec()
+        super().finish()
     
     def do_GET(self):
         """Handle GET requests."""
         if self.path == '/stream.mp4':
             self.serve_stream()
+        elif self.path.split('?', 1)[0] == '/metrics':
+            self.serve_metrics()
+        elif self.path.startswith(HLS_PREFIX):
+            self.serve_hls_file()
         else:
             self.serve_static_file()
     
+    def do_HEAD(self):
+        """Handle HEAD requests for files."""
+        if self.path.startswith(HLS_PREFIX):
+            self.serve_hls_file()
+        elif self.path != '/stream.mp4':
+            self.serve_static_file()
+        else:
+            self.send_error(405, "Method not allowed")
+    
     def serve_stream(self):
         """Serve the video stream."""
-        if not self.stream_path or not os.path.exists(self.stream_path):
+        if self.server.stream_buffer is not None:
+            self.serve_buffered_stream()
+            return
+
+        stream_path = self.server.stream_path
+        if not stream_path or not os.path.exists(stream_path):
             self.send_error(404, "Stream not found")
             return
         
@@ -40,113 +140,512 @@ class StreamRequestHandler(BaseHTTPRequestHandler):
             self.send_response(200)
             self.send_header('Content-Type', 'video/mp4')  # Use MP4 for Chromecast compatibility
             self.send_header('Access-Control-Allow-Origin', '*')  # Allow CORS
-            self.end_headers()
+            chunked = self._start_live_body()
             
             # Stream the video file
-            with open(self.stream_path, 'rb') as f:
+            with open(stream_path, 'rb') as f:
                 while True:
                     chunk = f.read(65536)  # 64KB chunks
                     if not chunk:
                         break
                     try:
-                        self.wfile.write(chunk)
+                        self._write_live_chunk(chunk, chunked)
                     except (ConnectionResetError, BrokenPipeError):
                         # Client disconnected
-                        break
+                        self.close_connection = True
+                        return
+                if chunked:
+                    self._end_live_body()
                         
         except Exception as e:
             logger.error(f"Streaming error: {e}")
             self.send_error(500, str(e))
     
+    def serve_buffered_stream(self):
+        """Serve the live stream from the in-memory fragment buffer."""
+        stream_buffer = self.server.stream_buffer
+        if stream_buffer.closed:
+            self.send_error(404, "Stream not found")
+            return
+
+        # Send response headers
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Cache-Control', 'no-cache')
+        chunked = self._start_live_body()
+
+        # A client that cannot take any data for this long is dropped
+        self.connection.settimeout(self.server.write_timeout)
+        client = f"{self.client_address[0]}:{self.client_address[1]}"
+        reader = stream_buffer.iter_stream(
+            stop_event=self.server.stop_event,
+            max_lag=self.server.max_lag,
+            client=client
+        )
+        server = self.server
+        server.stream_clients.inc()
+        try:
+            for chunk in reader:
+                started = time.monotonic()
+                if reader.fragment_timestamp is not None:
+                    server.segment_age.observe(started - reader.fragment_timestamp)
+                self._write_live_chunk(chunk, chunked)
+                server.write_latency.observe(time.monotonic() - started)
+                server.bytes_sent.inc(len(chunk), client=self.client_address[0])
+            if chunked:
+                # The stream ended cleanly, so the connection can be reused
+                self._end_live_body()
+            if server.stop_event.is_set():
+                self.close_connection = True
+        except (ConnectionResetError, BrokenPipeError):
+            # Client disconnected
+            logger.debug(f"Stream client {client} disconnected")
+            self.close_connection = True
+        except socket.timeout:
+            logger.warning(f"Stream client {client} stalled, disconnecting")
+            self.close_connection = True
+        finally:
+            server.stream_clients.dec()
+        if reader.skips:
+            logger.info(f"Stream client {client} was skipped ahead {reader.skips} times")
+    
+    def serve_hls_file(self):
+        """Serve an HLS playlist or segment from hls_dir."""
+        hls_dir = self.server.hls_dir
+        name = self.path[len(HLS_PREFIX):].split('?', 1)[0]
+        file_type = HLS_FILE_TYPES.get(os.path.splitext(name)[1])
+        
+        # Only plain file names inside hls_dir are served
+        if not hls_dir or not file_type or name != os.path.basename(name):
+            self.send_error(404, "File not found")
+            return
+        
+        content_type, cache_control = file_type
+        self.send_file(os.path.join(hls_dir, name), content_type, cache_control,
+                       record_age=name.endswith('.ts'))
+    
+    def serve_metrics(self):
+        """Serve the server and encoder metrics in Prometheus text format."""
+        body = self.server.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (ConnectionResetError, BrokenPipeError):
+            # Client disconnected
+            pass
+    
     def serve_static_file(self):
         """Serve static files from web_root."""
-        if not self.web_root:
+        web_root = self.server.web_root
+        if not web_root:
             self.send_error(404, "Web root not configured")
             return
 
         # Convert URL path to file path
-        file_path = self.path
+        file_path = self.path.split('?', 1)[0]
         if file_path == '/':
             file_path = '/index.html'
         
-        full_path = os.path.join(self.web_root, file_path.lstrip('/'))
+        full_path = os.path.join(web_root, file_path.lstrip('/'))
         
         # Basic security check - ensure file is within web_root
-        if not os.path.abspath(full_path).startswith(os.path.abspath(self.web_root)):
+        if not os.path.abspath(full_path).startswith(os.path.abspath(web_root)):
             self.send_error(403, "Access denied")
             return
         
+        # Serve from memory when the asset is cached
+        if self.server.asset_cache:
+            asset = self.server.asset_cache.get(file_path.lstrip('/'))
+            if asset:
+                self.send_cached_asset(asset)
+                return
+        
+        # Determine content type
+        content_type, _ = mimetypes.guess_type(full_path)
+        if not content_type:
+            content_type = 'application/octet-stream'
+        
+        self.send_file(full_path, content_type)
+    
+    def send_cached_asset(self, asset: StaticAsset):
+        """
+        Send a cached asset, picking the encoding from Accept-Encoding.
+        
+        Args:
+            asset: The cached asset to send
+        """
+        # Byte ranges are only served on the identity encoding
+        range_header = self.headers.get('Range')
+        encoding = None
+        if not range_header:
+            encoding = choose_encoding(self.headers.get('Accept-Encoding'), asset.encodings)
+        etag = asset.variant_etag(encoding)
+        body = asset.variant(encoding)
+        
+        if self._is_not_modified(etag, asset.mtime):
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', asset.last_modified)
+            if asset.encodings:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.end_headers()
+            return
+        
+        byte_range = None
+        if_range = self.headers.get('If-Range')
+        if range_header and (not if_range or if_range in (etag, asset.last_modified)):
+            try:
+                byte_range = parse_byte_range(range_header, len(body))
+            except RangeNotSatisfiable:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{len(body)}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        
+        if byte_range:
+            first, last = byte_range
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {first}-{last}/{len(body)}')
+            body = body[first:last + 1]
+        else:
+            self.send_response(200)
+        
+        self.send_header('Content-Type', asset.content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        if asset.encodings:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', asset.last_modified)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        
+        if self.command == 'HEAD':
+            return
         try:
-            if not os.path.exists(full_path):
-                self.send_error(404, "File not found")
+            self.wfile.write(body)
+            self.server.bytes_sent.inc(len(body), client=self.client_address[0])
+        except (ConnectionResetError, BrokenPipeError):
+            # Client disconnected
+            self.close_connection = True
+    
+    def send_file(self, full_path: str, content_type: str, cache_control: Optional[str] = None,
+                  record_age: bool = False):
+        """
+        Send a file with support for conditional and byte-range requests.
+        
+        The body is copied straight from the file to the socket with
+        sendfile(), so memory use does not grow with the file size.
+        
+        Args:
+            full_path: Path of the file to send
+            content_type: MIME type of the file
+            cache_control: Optional Cache-Control header value
+            record_age: Record the file age in the segment age histogram
+        """
+        try:
+            f = open(full_path, 'rb')
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            self.send_error(404, "File not found")
+            return
+        except OSError as e:
+            logger.error(f"Error opening {full_path}: {e}")
+            self.send_error(500, str(e))
+            return
+        
+        with f:
+            stat = os.fstat(f.fileno())
+            size = stat.st_size
+            etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+            last_modified = formatdate(stat.st_mtime, usegmt=True)
+            
+            if self._is_not_modified(etag, stat.st_mtime):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                if cache_control:
+                    self.send_header('Cache-Control', cache_control)
+                self.end_headers()
                 return
-                
-            # Determine content type
-            content_type, _ = mimetypes.guess_type(full_path)
-            if not content_type:
-                content_type = 'application/octet-stream'
             
-            # Send headers
-            self.send_response(200)
+            # Honour Range only if the client's copy is still current
+            byte_range = None
+            range_header = self.headers.get('Range')
+            if_range = self.headers.get('If-Range')
+            if range_header and (not if_range or if_range in (etag, last_modified)):
+                try:
+                    byte_range = parse_byte_range(range_header, size)
+                except RangeNotSatisfiable:
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{size}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+            
+            if byte_range:
+                first, last = byte_range
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {first}-{last}/{size}')
+            else:
+                first, last = 0, size - 1
+                self.send_response(200)
+            
+            length = last - first + 1
             self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(length))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', last_modified)
+            if cache_control:
+                self.send_header('Cache-Control', cache_control)
             self.send_header('Access-Control-Allow-Origin', '*')
             self.end_headers()
             
-            # Send file content
-            with open(full_path, 'rb') as f:
-                self.wfile.write(f.read())
-                
-        except Exception as e:
-            logger.error(f"Error serving static file: {e}")
-            self.send_error(500, str(e))
+            if self.command == 'HEAD' or length <= 0:
+                return
+            if record_age:
+                self.server.segment_age.observe(max(time.time() - stat.st_mtime, 0.0))
+            try:
+                self.wfile.flush()
+                sent = self.connection.sendfile(f, first, length)
+                self.server.bytes_sent.inc(sent, client=self.client_address[0])
+                if record_age:
+                    self.server.stream_activity[self.client_address[0]] = time.monotonic()
+                if sent < length:
+                    # The file shrank while sending; the framing is now broken
+                    self.close_connection = True
+            except (ConnectionResetError, BrokenPipeError):
+                # Client disconnected
+                self.close_connection = True
+    
+    def _start_live_body(self) -> bool:
+        """
+        Finish the headers of an open-ended live response.
+        
+        HTTP/1.1 clients get chunked transfer encoding, so the connection
+        stays usable afterwards. Older clients get a body delimited by
+        closing the connection.
+        
+        Returns:
+            bool: True if the body must be sent in chunks
+        """
+        chunked = self.request_version != 'HTTP/1.0'
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        return chunked
+    
+    def _write_live_chunk(self, data: bytes, chunked: bool):
+        """
+        Write part of a live response body.
+        
+        Args:
+            data: Body bytes to send
+            chunked: Whether the response uses chunked transfer encoding
+        """
+        if not data:
+            # An empty chunk would terminate the body
+            return
+        if chunked:
+            # Gather the framing and the fragment into one send instead of
+            # joining them, so the fragment isn't copied for every client
+            self._send_buffers((f'{len(data):X}\r\n'.encode('ascii'), data, b'\r\n'))
+        else:
+            self.wfile.write(data)
+        self.server.stream_activity[self.client_address[0]] = time.monotonic()
+    
+    def _send_buffers(self, buffers):
+        """
+        Send several buffers back to back with scatter/gather I/O.
+        
+        Args:
+            buffers: Byte buffers to send in order
+        """
+        views = [memoryview(buffer) for buffer in buffers]
+        while views:
+            sent = self.connection.sendmsg(views)
+            # Drop what went out, resuming a partial send where it stopped
+            while views and sent >= len(views[0]):
+                sent -= len(views[0])
+                views.pop(0)
+            if sent:
+                views[0] = views[0][sent:]
+    
+    def _end_live_body(self):
+        """Terminate a chunked response body."""
+        self.wfile.write(b'0\r\n\r\n')
+    
+    def _is_not_modified(self, etag: str, mtime: float) -> bool:
+        """
+        Check the conditional request headers against the file's validators.
+        
+        Args:
+            etag: Current entity tag of the file
+            mtime: Modification time of the file
+            
+        Returns:
+            bool: True if the client's cached copy is still valid
+        """
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            # If-None-Match takes precedence over If-Modified-Since
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags or f'W/{etag}' in tags
+        
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
     
     def log_message(self, format, *args):
         """Override to use our logger."""
         logger.debug(format % args)
 
+class StreamHTTPServer(ThreadingHTTPServer):
+    """
+    HTTP server holding the stream sources shared by all request handlers.
+    
+    Every connection is handled in its own thread, so long-lived stream
+    connections do not block other receivers or the web UI.
+    """
+    
+    # Don't keep shutdown waiting on receivers that are still connected
+    daemon_threads = True
+    block_on_close = False
+    
+    # Allow bursts of receivers and page assets connecting at once
+    request_queue_size = 64
+
+    def __init__(self, server_address: Tuple[str, int], stream_path: Optional[str] = None,
+                 stream_buffer: Optional[StreamBuffer] = None, hls_dir: Optional[str] = None,
+                 web_root: Optional[str] = None, asset_cache: Optional[StaticAssetCache] = None,
+                 metrics: Optional[MetricsRegistry] = None):
+        # Metrics must exist before the first connection is accepted
+        self.metrics = metrics or MetricsRegistry()
+        self.active_connections = self.metrics.gauge(
+            'manjcast_http_active_connections', 'Open HTTP connections')
+        self.stream_clients = self.metrics.gauge(
+            'manjcast_stream_clients', 'Clients receiving the live stream')
+        self.bytes_sent = self.metrics.counter(
+            'manjcast_client_bytes_sent_total', 'Response body bytes sent per client address')
+        self.write_latency = self.metrics.histogram(
+            'manjcast_stream_write_seconds', 'Time to write one live stream chunk to a client')
+        self.segment_age = self.metrics.histogram(
+            'manjcast_segment_age_seconds', 'Age of a fragment or HLS segment when it is sent',
+            buckets=SEGMENT_AGE_BUCKETS)
+        
+        super().__init__(server_address, StreamRequestHandler)
+        self.stream_path = stream_path
+        self.stream_buffer = stream_buffer
+        self.hls_dir = hls_dir
+        self.web_root = web_root
+        self.asset_cache = asset_cache
+        self.stop_event = threading.Event()
+        
+        # Per-client backpressure limits for the live stream
+        self.max_lag = 3.0
+        self.write_timeout = 10.0
+        
+        # Seconds an idle persistent connection is kept open
+        self.keep_alive_timeout = 15.0
+        
+        # When stream data was last sent to each client address (monotonic clock)
+        self.started = time.monotonic()
+        self.stream_activity: Dict[str, float] = {}
+
 class StreamServer:
     """HTTP server for streaming video to Cast devices."""
     
-    def __init__(self, host: str = '0.0.0.0', port: int = 0, web_root: str = None):
+    def __init__(self, host: Optional[str] = None, port: int = 0, web_root: str = None,
+                 max_lag: float = 3.0):
         """
         Initialize the streaming server.
         
         Args:
-            host: Host to bind to (default: all interfaces)
+            host: Host to bind to (default: the interface facing the receiver)
             port: Port to bind to (0 for automatic)
             web_root: Path to web files directory
+            max_lag: Seconds a stream client may fall behind live before it
+                is skipped ahead to the latest keyframe
         """
         self._host = host
         self._port = port
         self._server = None
         self._server_thread = None
+        self._address = None
         self._stream_path = None
         self._web_root = web_root
+        self._max_lag = max_lag
+        self._asset_cache = StaticAssetCache(web_root) if web_root else None
+        self._assets_loaded = False
+        
+        # Kept across restarts so counters survive between casts
+        self._metrics = MetricsRegistry()
+        self._metrics.add_collector(self._collect_metrics)
+        
+        # Local interfaces, enumerated once
+        self._interfaces = NetworkInterfaces()
 
-    def start(self, stream_path: str) -> Tuple[str, int]:
+    def start(self, stream_path: Optional[str] = None,
+              stream_buffer: Optional[StreamBuffer] = None,
+              hls_dir: Optional[str] = None,
+              peer_address: Optional[str] = None) -> Tuple[str, int]:
         """
         Start the streaming server.
         
         Args:
             stream_path: Path to the video file to stream
+            stream_buffer: In-memory fragment buffer to stream instead of a file
+            hls_dir: Directory holding the HLS playlist and segments
+            peer_address: IP address of the receiver; the server binds only
+                the local interface on its subnet
             
         Returns:
             Tuple[str, int]: Server URL and port
         """
         if self._server:
             raise RuntimeError("Server is already running")
+        if not stream_path and not stream_buffer and not hls_dir:
+            raise ValueError("One of stream_path, stream_buffer or hls_dir is required")
         
         try:
+            # Load the web UI into memory once, up front
+            if self._asset_cache and not self._assets_loaded:
+                self._asset_cache.preload()
+                self._assets_loaded = True
+            
+            local_ip, bind_host = self._select_address(peer_address)
+            
             # Create server
-            self._server = HTTPServer((self._host, self._port), StreamRequestHandler)
-            self._server.RequestHandlerClass.stream_path = stream_path
-            self._server.RequestHandlerClass.web_root = self._web_root
+            self._server = StreamHTTPServer(
+                (bind_host, self._port),
+                stream_path=stream_path,
+                stream_buffer=stream_buffer,
+                hls_dir=hls_dir,
+                web_root=self._web_root,
+                asset_cache=self._asset_cache,
+                metrics=self._metrics
+            )
+            self._server.max_lag = self._max_lag
+            self._stream_path = stream_path
             
             # Get the actual port (in case we used 0)
             actual_port = self._server.server_port
-            
-            # Get local IP address
-            local_ip = self._get_local_ip()
+            self._address = bind_host
             
             # Start server in a thread
             self._server_thread = threading.Thread(
@@ -167,6 +666,8 @@ class StreamServer:
         """Stop the streaming server."""
         if self._server:
             try:
+                # Release handlers waiting on the live stream
+                self._server.stop_event.set()
                 self._server.shutdown()
                 self._server.server_close()
                 if self._server_thread:
@@ -176,23 +677,87 @@ class StreamServer:
             finally:
                 self._server = None
                 self._server_thread = None
+                self._address = None
+    
+    def _collect_metrics(self, registry: MetricsRegistry):
+        """Update the stream buffer metrics before a scrape."""
+        server = self._server
+        stream_buffer = server.stream_buffer if server else None
+        if stream_buffer is not None:
+            registry.counter(
+                'manjcast_stream_skips_total',
+                'Times a lagging client was skipped ahead to the latest keyframe'
+            ).set_total(stream_buffer.skip_count)
+    
+    @property
+    def is_running(self) -> bool:
+        """Check if the server is up and serving requests."""
+        thread = self._server_thread
+        return self._server is not None and thread is not None and thread.is_alive()
     
-    def _get_local_ip(self) -> str:
+    def stream_idle_time(self, peer_address: str) -> Optional[float]:
         """
-        Get the local IP address.
+        Get how long a receiver has not been sent any stream data.
         
+        Args:
+            peer_address: IP address of the receiver
+            
         Returns:
-            str: Local IP address
+            Optional[float]: Seconds since the receiver was last sent stream
+            data (or since the server started), or None if not running
         """
-        try:
-            # Create a temporary socket to get local IP
-            s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-            s.connect(('8.8.8.8', 80))  # Doesn't actually send any data
-            ip = s.getsockname()[0]
-            s.close()
-            return ip
-        except Exception:
-            return '127.0.0.1'  # Fallback to localhost
+        server = self._server
+        if server is None:
+            return None
+        return time.monotonic() - server.stream_activity.get(peer_address, server.started)
+    
+    @property
+    def metrics(self) -> MetricsRegistry:
+        """Get the metrics registry served at /metrics."""
+        return self._metrics
+    
+    def can_reach(self, peer_address: str) -> bool:
+        """
+        Check whether a receiver can connect to the running server.
+        
+        Args:
+            peer_address: IP address of the receiver
+            
+        Returns:
+            bool: True if the server listens on an address the receiver can reach
+        """
+        if not self._server:
+            return False
+        if self._address == '0.0.0.0':
+            return True
+        return self._interfaces.address_for(peer_address) == self._address
+    
+    def _select_address(self, peer_address: Optional[str]) -> Tuple[str, str]:
+        """
+        Pick the address to advertise and the host to bind.
+        
+        Uses the local address on the receiver's subnet, without any
+        routing lookup, so hosts on isolated networks without a default
+        route work too.
+        
+        Args:
+            peer_address: IP address of the receiver, if known
+            
+        Returns:
+            Tuple[str, str]: Address for the stream URL and host to bind
+        """
+        if self._host and self._host != '0.0.0.0':
+            return self._host, self._host
+        
+        if peer_address:
+            address = self._interfaces.address_for(peer_address)
+            if address:
+                return address, self._host or address
+            logger.warning(f"No local interface on the subnet of {peer_address}")
+        
+        # Receiver unknown or routed: listen everywhere, advertise the first LAN address
+        address = self._interfaces.default_address() or '127.0.0.1'
+        return address, '0.0.0.0'
     
     def __del__(self):
         """Clean up resources."""
@@ -0,0 +1,121 @@
+"""
+Window tracking module for ManjCast.
+Follows the geometry of a captured window so the capture region can be updated.
+"""
+
+import logging
+import subprocess
+import threading
+from typing import Callable, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Window geometry as (x, y, width, height) in root window coordinates
+Geometry = Tuple[int, int, int, int]
+
+def get_window_geometry(window_id: str) -> Optional[Geometry]:
+    """
+    Get the on-screen geometry of an X11 window.
+
+    Args:
+        window_id: X11 window ID, as reported by wmctrl (e.g. "0x03a00007")
+
+    Returns:
+        Optional[Geometry]: Window position and size, or None if unavailable
+    """
+    try:
+        output = subprocess.check_output(
+            ['xwininfo', '-id', str(window_id)],
+            text=True,
+            stderr=subprocess.DEVNULL
+        )
+    except (subprocess.SubprocessError, FileNotFoundError):
+        return None
+
+    values = {}
+    for line in output.splitlines():
+        key, _, value = line.strip().partition(':')
+        if key in ('Absolute upper-left X', 'Absolute upper-left Y', 'Width', 'Height'):
+            try:
+                values[key] = int(value)
+            except ValueError:
+                return None
+
+    if len(values) != 4:
+        return None
+    return (
+        values['Absolute upper-left X'],
+        values['Absolute upper-left Y'],
+        values['Width'],
+        values['Height']
+    )
+
+class WindowTracker:
+    """Polls a window's geometry and reports moves and resizes."""
+
+    def __init__(self, window_id: str, on_change: Callable[[Geometry], None],
+                 interval: float = 1.0):
+        """
+        Initialize the window tracker.
+
+        Args:
+            window_id: X11 window ID to follow
+            on_change: Called with the new geometry once it has settled
+            interval: Polling interval in seconds
+        """
+        self._window_id = window_id
+        self._on_change = on_change
+        self._interval = interval
+        self._geometry = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start tracking the window in a background thread."""
+        if self._thread:
+            return
+        self._geometry = get_window_geometry(self._window_id)
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop tracking the window."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        """Poll the window geometry until stopped."""
+        pending = None
+        while not self._stop_event.wait(self._interval):
+            geometry = get_window_geometry(self._window_id)
+            if geometry is None:
+                if self._geometry is not None:
+                    logger.warning(f"Lost track of window {self._window_id}")
+                    self._geometry = None
+                continue
+
+            if geometry == self._geometry:
+                pending = None
+                continue
+
+            # Wait for the geometry to settle so a drag restarts capture only once
+            if geometry != pending:
+                pending = geometry
+                continue
+
+            pending = None
+            self._geometry = geometry
+            logger.info(f"Window {self._window_id} moved to {geometry}")
+            try:
+                self._on_change(geometry)
+            except Exception as e:
+                logger.error(f"Failed to apply window geometry: {e}")
+
+    @property
+    def geometry(self) -> Optional[Geometry]:
+        """Get the last known window geometry."""
+        return self._geometry
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Glass-to-glass latency probe for ManjCast.
+Captures with the latency stamp burnt into every frame, serves the stream on
+loopback and decodes it locally, then reports how long frames take from
+capture to encoded fragment, to the receiver and to a decoded picture.
+
+Usage:
+    python -m manjcast.latency_probe --duration 30 --source synthetic
+"""
+
+import argparse
+import collections
+import http.client
+import logging
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .core.screen_capture import (
+    ScreenCaptureManager, OutputMode, LATENCY_STAMP_BITS, LATENCY_STAMP_BLOCK
+)
+from .core.stream_buffer import iter_boxes, read_box
+from .core.stream_server import StreamServer
+from .loadgen import RECEIVER_HEADERS, TimedStreamBuffer, fragment_sequence, percentile
+
+# Configure logging
+logger = logging.getLogger('latency_probe')
+
+STAMP_WIDTH = LATENCY_STAMP_BITS * LATENCY_STAMP_BLOCK
+STAMP_HEIGHT = LATENCY_STAMP_BLOCK
+
+# Stamps further in the past than this are misreads
+MAX_LATENCY = 60.0
+
+STAGES = (
+    ('capture_encode', "לכידה ← קידוד"),
+    ('encode_serve', "קידוד ← שרת"),
+    ('serve_display', "שרת ← תצוגה"),
+    ('total', "סה\"כ"),
+)
+
+def fragment_samples(data: bytes) -> int:
+    """
+    Count the samples (frames) of a moof/mdat fragment.
+
+    Args:
+        data: Raw fragment bytes
+
+    Returns:
+        int: Number of samples listed in the fragment's track runs
+    """
+    samples = 0
+    for box_type, start, end in iter_boxes(data):
+        if box_type != b'moof':
+            continue
+        for traf_type, traf_start, traf_end in iter_boxes(data, start, end):
+            if traf_type != b'traf':
+                continue
+            for trun_type, trun_start, trun_end in iter_boxes(data, traf_start, traf_end):
+                if trun_type == b'trun' and trun_end - trun_start >= 8:
+                    samples += int.from_bytes(data[trun_start + 4:trun_start + 8], 'big')
+    return samples
+
+def decode_stamp(strip: bytes, width: int = STAMP_WIDTH) -> Optional[int]:
+    """
+    Read the latency stamp from the top-left strip of a decoded gray frame.
+
+    Args:
+        strip: Gray pixels of the strip, row by row
+        width: Width of the strip in pixels
+
+    Returns:
+        Optional[int]: Capture wallclock in milliseconds modulo 2^32, or None
+            if a block is neither clearly black nor clearly white
+    """
+    center = LATENCY_STAMP_BLOCK // 2
+    value = 0
+    for bit in range(LATENCY_STAMP_BITS):
+        x = bit * LATENCY_STAMP_BLOCK + center
+        # Average four pixels around the block center
+        level = sum(
+            strip[(center + dy) * width + x + dx] for dy in (-1, 0) for dx in (-1, 0)
+        ) / 4
+        if 64 < level < 192:
+            return None
+        if level >= 192:
+            value |= 1 << bit
+    return value
+
+def unwrap_stamp(stamp: int, now: float) -> float:
+    """
+    Turn a stamp back into a wallclock time, taking the nearest past wrap.
+
+    Args:
+        stamp: Capture wallclock in milliseconds modulo 2^32
+        now: Current wallclock in seconds
+
+    Returns:
+        float: Capture wallclock in seconds
+    """
+    now_ms = int(now * 1000)
+    return (now_ms - (now_ms - stamp) % (1 << LATENCY_STAMP_BITS)) / 1000
+
+class LoopbackReceiver:
+    """Plays the served stream with a local FFmpeg decoder and times every frame."""
+
+    def __init__(self, port: int, arrivals: Dict[int, float], clock_offset: float):
+        """
+        Initialize the receiver.
+
+        Args:
+            port: Port of the stream server on 127.0.0.1
+            arrivals: Monotonic times fragments arrived from the encoder, by sequence
+            clock_offset: Wallclock minus monotonic clock, to compare both
+        """
+        self._port = port
+        self._arrivals = arrivals
+        self._clock_offset = clock_offset
+        self._fragments = collections.deque()   # [sequence, frames left, received]
+        self._lock = threading.Lock()
+        self._connection = None
+        self._decoder = None
+        self._threads = []
+        self._stopped = threading.Event()
+        self.samples: Dict[str, List[float]] = {stage: [] for stage, _ in STAGES}
+        self.frames = 0
+        self.unreadable = 0
+
+    def start(self):
+        """Connect to the server and start decoding."""
+        ffmpeg = shutil.which('ffmpeg')
+        if not ffmpeg:
+            raise RuntimeError("ffmpeg is not installed. Please install it first.")
+        self._decoder = subprocess.Popen(
+            [
+                ffmpeg, '-hide_banner', '-loglevel', 'error',
+                # Hand every frame out as soon as it is decoded
+                '-fflags', 'nobuffer', '-flags', 'low_delay',
+                '-probesize', '32', '-analyzeduration', '0', '-threads', '1',
+                '-f', 'mp4', '-i', 'pipe:0',
+                '-vf', f'crop={STAMP_WIDTH}:{STAMP_HEIGHT}:0:0,format=gray',
+                '-fps_mode', 'passthrough',
+                '-f', 'rawvideo', 'pipe:1'
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+
+        self._connection = http.client.HTTPConnection('127.0.0.1', self._port, timeout=10)
+        headers = dict(
+            line.split(': ', 1) for line in RECEIVER_HEADERS.strip().split('\r\n')
+        )
+        self._connection.request('GET', '/stream.mp4', headers=headers)
+        response = self._connection.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"Unexpected response {response.status}")
+
+        self._threads = [
+            threading.Thread(target=self._receive, args=(response,), daemon=True),
+            threading.Thread(target=self._display, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """Disconnect and stop the decoder."""
+        self._stopped.set()
+        if self._connection:
+            self._connection.close()
+        if self._decoder:
+            self._decoder.kill()
+            self._decoder.wait()
+        for thread in self._threads:
+            thread.join(timeout=2)
+
+    def _receive(self, response: http.client.HTTPResponse):
+        """Feed the stream to the decoder, noting when each fragment arrived."""
+        pending = []
+        try:
+            while not self._stopped.is_set():
+                box = read_box(response)
+                if box is None:
+                    break
+                box_type, data = box
+                if box_type == b'mdat' and pending:
+                    fragment = b''.join(pending) + data
+                    pending = []
+                    # Queue the fragment before the decoder can output its frames
+                    with self._lock:
+                        self._fragments.append(
+                            [fragment_sequence(fragment), fragment_samples(fragment), time.time()]
+                        )
+                    self._decoder.stdin.write(fragment)
+                elif box_type in (b'ftyp', b'moov'):
+                    self._decoder.stdin.write(data)
+                else:
+                    pending.append(data)
+                self._decoder.stdin.flush()
+        except (OSError, ValueError) as e:
+            if not self._stopped.is_set():
+                logger.error(f"Receiving the stream failed: {e}")
+
+    def _display(self):
+        """Read decoded stamp strips and record the latency of each frame."""
+        frame_size = STAMP_WIDTH * STAMP_HEIGHT
+        stdout = self._decoder.stdout
+        while not self._stopped.is_set():
+            strip = stdout.read(frame_size)
+            if len(strip) < frame_size:
+                break
+            displayed = time.time()
+            with self._lock:
+                while self._fragments and self._fragments[0][1] <= 0:
+                    self._fragments.popleft()
+                if not self._fragments:
+                    continue
+                fragment = self._fragments[0]
+                fragment[1] -= 1
+            self.frames += 1
+            self._record(strip, fragment[0], fragment[2], displayed)
+
+    def _record(self, strip: bytes, sequence: Optional[int], received: float, displayed: float):
+        """Split one frame's latency into stages."""
+        stamp = decode_stamp(strip)
+        if stamp is None:
+            self.unreadable += 1
+            return
+        captured = unwrap_stamp(stamp, displayed)
+        encoded = self._arrivals.get(sequence)
+        if displayed - captured > MAX_LATENCY or encoded is None:
+            self.unreadable += 1
+            return
+        encoded += self._clock_offset
+
+        self.samples['capture_encode'].append(encoded - captured)
+        self.samples['encode_serve'].append(received - encoded)
+        self.samples['serve_display'].append(displayed - received)
+        self.samples['total'].append(displayed - captured)
+
+def print_report(receiver: LoopbackReceiver):
+    """Print the latency distributions per stage."""
+    print("\nתוצאות מדידת השהיה:")
+    print(f"פריימים: {receiver.frames}, לא קריאים: {receiver.unreadable}")
+    for stage, label in STAGES:
+        values = receiver.samples[stage]
+        if not values:
+            continue
+        print(f"{label}: p50 {percentile(values, 0.5) * 1000:.0f} ms, "
+              f"p90 {percentile(values, 0.9) * 1000:.0f} ms, "
+              f"p99 {percentile(values, 0.99) * 1000:.0f} ms, "
+              f"מרבי {max(values) * 1000:.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="מדידת השהיה מקצה לקצה של ManjCast")
+    parser.add_argument('--duration', type=float, default=30.0, help="משך המדידה בשניות")
+    parser.add_argument('--source', choices=['synthetic', 'fullscreen'], default='synthetic',
+                        help="מקור הלכידה")
+    parser.add_argument('--size', default='1280x720', help="גודל המקור הסינתטי")
+    parser.add_argument('--framerate', type=int, default=30, help="קצב פריימים")
+    parser.add_argument('--keyframe-interval', type=float, default=2.0,
+                        help="שניות בין פריימי מפתח")
+    parser.add_argument('--fragment-duration', type=float, default=0.5,
+                        help="אורך מקטע בשניות (0 = מקטע לכל GOP)")
+    parser.add_argument('--verbose', action='store_true', help="הצג הודעות ניפוי")
+    args = parser.parse_args()
+
+    # Configure logging
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    process = None
+    stream_buffer = None
+    receiver = None
+    server = StreamServer(host='127.0.0.1')
+    try:
+        capture = ScreenCaptureManager(auto_tune=args.source != 'synthetic')
+        capture.settings = {
+            'capture_type': args.source,
+            'synthetic_size': args.size,
+            'framerate': args.framerate,
+            'keyframe_interval': args.keyframe_interval,
+            'fragment_duration': args.fragment_duration,
+            'output_mode': OutputMode.FMP4.value,
+            'audio': False,
+            'latency_stamp': True
+        }
+
+        print(f"מפעיל לכידה ({args.source}) עם חותמת זמן...")
+        process = capture.start_capture()
+        stream_buffer = TimedStreamBuffer()
+        stream_buffer.attach(process.stdout)
+        _, port = server.start(stream_buffer=stream_buffer)
+
+        started = time.monotonic()
+        while not stream_buffer.is_ready:
+            if process.poll() is not None or time.monotonic() - started > 15:
+                raise RuntimeError("הלכידה לא התחילה לשדר")
+            time.sleep(0.1)
+
+        print(f"מודד השהיה דרך 127.0.0.1:{port} למשך {args.duration:.0f} שניות...")
+        receiver = LoopbackReceiver(port, stream_buffer.arrivals, time.time() - time.monotonic())
+        receiver.start()
+        time.sleep(args.duration)
+        receiver.stop()
+        print_report(receiver)
+
+    except KeyboardInterrupt:
+        print("\nהמדידה הופסקה")
+        if receiver:
+            receiver.stop()
+            print_report(receiver)
+    except Exception as e:
+        logger.error(f"שגיאה: {e}")
+        sys.exit(1)
+    finally:
+        server.stop()
+        if process:
+            capture.stop_capture(process)
+        if stream_buffer:
+            stream_buffer.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Load test for the ManjCast stream server.
+Runs a synthetic FFmpeg source and hundreds of simulated receivers on loopback,
+then reports throughput, time to first byte and how far clients lag behind live.
+
+Usage:
+    python -m manjcast.loadgen --clients 200 --duration 30 --mode fmp4
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .core.screen_capture import ScreenCaptureManager, OutputMode
+from .core.stream_buffer import StreamBuffer, iter_boxes
+from .core.stream_server import StreamServer
+
+# Configure logging
+logger = logging.getLogger('loadgen')
+
+# What a Cast device sends with its media requests
+RECEIVER_HEADERS = (
+    'User-Agent: Mozilla/5.0 (X11; Linux armv7l) AppleWebKit/537.36 (KHTML, like Gecko) '
+    'Chrome/114.0.0.0 Safari/537.36 CrKey/1.56.500000\r\n'
+    'Accept-Encoding: identity;q=1, *;q=0\r\n'
+)
+
+def fragment_sequence(data: bytes) -> Optional[int]:
+    """
+    Get the sequence number from the mfhd box of a moof/mdat fragment.
+
+    Args:
+        data: Raw fragment bytes
+
+    Returns:
+        Optional[int]: Fragment sequence number, or None for other data
+    """
+    for box_type, start, end in iter_boxes(data):
+        if box_type != b'moof':
+            continue
+        for child_type, child_start, child_end in iter_boxes(data, start, end):
+            if child_type == b'mfhd' and child_end - child_start >= 8:
+                return int.from_bytes(data[child_start + 4:child_start + 8], 'big')
+        return None
+    return None
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values (0 if empty)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(fraction * len(ordered)), len(ordered) - 1)
+    return ordered[index]
+
+class TimedStreamBuffer(StreamBuffer):
+    """Stream buffer that records when each fragment arrived from the encoder."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.arrivals: Dict[int, float] = {}
+
+    def append(self, data: bytes):
+        sequence = fragment_sequence(data)
+        if sequence is not None:
+            self.arrivals[sequence] = time.monotonic()
+        super().append(data)
+
+class ClientStats:
+    """Measurements collected by one simulated receiver."""
+
+    def __init__(self):
+        self.bytes = 0
+        self.connects = 0
+        self.errors = 0
+        self.ttfb: List[float] = []
+        self.lags: List[float] = []
+        self.active_time = 0.0
+
+class ReceiverSimulator:
+    """Simulates Cast receivers pulling the stream from a local server."""
+
+    def __init__(self, port: int, mode: OutputMode, duration: float, ramp: float,
+                 reconnect: float, arrivals: Optional[Dict[int, float]] = None,
+                 hls_dir: Optional[str] = None):
+        """
+        Initialize the simulator.
+
+        Args:
+            port: Port of the stream server on 127.0.0.1
+            mode: Output mode being served (fmp4 or hls)
+            duration: Seconds to run after the last client has connected
+            ramp: Seconds over which clients connect
+            reconnect: Average seconds between reconnects per client (0 disables)
+            arrivals: Fragment arrival times, to measure lag in fmp4 mode
+            hls_dir: HLS directory, to measure segment lag in hls mode
+        """
+        self._port = port
+        self._mode = mode
+        self._duration = duration
+        self._ramp = ramp
+        self._reconnect = reconnect
+        self._arrivals = arrivals or {}
+        self._hls_dir = hls_dir
+        self._deadline = 0.0
+
+    async def run(self, clients: int) -> List[ClientStats]:
+        """
+        Run the simulated receivers until the test ends.
+
+        Args:
+            clients: Number of receivers to simulate
+
+        Returns:
+            List[ClientStats]: Measurements per receiver
+        """
+        self._deadline = time.monotonic() + self._ramp + self._duration
+        stats = [ClientStats() for _ in range(clients)]
+        client = self._stream_client if self._mode == OutputMode.FMP4 else self._hls_client
+        await asyncio.gather(*(
+            client(stats[i], i * self._ramp / clients) for i in range(clients)
+        ))
+        return stats
+
+    def _next_reconnect(self) -> float:
+        """Get the time the current connection should be dropped."""
+        if not self._reconnect:
+            return self._deadline
+        return time.monotonic() + random.uniform(0.5, 1.5) * self._reconnect
+
+    def _remaining(self) -> float:
+        """Seconds left until the test ends."""
+        return self._deadline - time.monotonic()
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open a connection to the server."""
+        return await asyncio.open_connection('127.0.0.1', self._port)
+
+    async def _read_headers(self, reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+        """Read a response status line and headers."""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Connection closed by server")
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                return status, headers
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    async def _stream_client(self, stats: ClientStats, delay: float):
+        """Receiver playing the progressive fragmented MP4 stream."""
+        await asyncio.sleep(delay)
+        while self._remaining() > 0:
+            writer = None
+            connected = time.monotonic()
+            try:
+                reader, writer = await self._open()
+                stats.connects += 1
+                sent = time.monotonic()
+                writer.write(
+                    f'GET /stream.mp4 HTTP/1.1\r\nHost: 127.0.0.1:{self._port}\r\n'
+                    f'{RECEIVER_HEADERS}Range: bytes=0-\r\n\r\n'.encode('ascii')
+                )
+                await writer.drain()
+                status, headers = await asyncio.wait_for(self._read_headers(reader), self._remaining())
+                if status != 200 or headers.get('transfer-encoding') != 'chunked':
+                    raise ConnectionError(f"Unexpected response {status}")
+
+                first = True
+                reconnect_at = self._next_reconnect()
+                while time.monotonic() < reconnect_at:
+                    timeout = max(min(reconnect_at, self._deadline) - time.monotonic(), 0.01)
+                    size_line = await asyncio.wait_for(reader.readline(), timeout)
+                    size = int(size_line.split(b';')[0], 16)
+                    if size == 0:
+                        break
+                    # A server stalling mid-chunk must not hold the client past its deadline
+                    timeout = max(min(reconnect_at, self._deadline) - time.monotonic(), 0.01)
+                    data = await asyncio.wait_for(reader.readexactly(size + 2), timeout)
+                    now = time.monotonic()
+                    if first:
+                        stats.ttfb.append(now - sent)
+                        first = False
+                    stats.bytes += size
+                    arrived = self._arrivals.get(fragment_sequence(data[:-2]))
+                    if arrived is not None:
+                        stats.lags.append(now - arrived)
+            except asyncio.TimeoutError:
+                pass
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+                stats.errors += 1
+                logger.debug(f"Stream client error: {e}")
+                await asyncio.sleep(0.5)
+            finally:
+                stats.active_time += time.monotonic() - connected
+                if writer:
+                    writer.close()
+
+    async def _hls_client(self, stats: ClientStats, delay: float):
+        """Receiver polling the HLS playlist and fetching new segments."""
+        await asyncio.sleep(delay)
+        fetched = set()
+        while self._remaining() > 0:
+            writer = None
+            connected = time.monotonic()
+            try:
+                reader, writer = await self._open()
+                stats.connects += 1
+                reconnect_at = self._next_reconnect()
+                while time.monotonic() < reconnect_at and self._remaining() > 0:
+                    _, playlist = await self._get(reader, writer, '/hls/stream.m3u8', stats)
+                    target_duration = 1.0
+                    segments = []
+                    for line in playlist.decode('utf-8', 'replace').splitlines():
+                        if line.startswith('#EXT-X-TARGETDURATION:'):
+                            target_duration = float(line.split(':', 1)[1])
+                        elif line and not line.startswith('#'):
+                            segments.append(line)
+
+                    if not fetched:
+                        # Players join three segments from the live edge
+                        fetched.update(segments[:-3])
+                    for name in segments:
+                        if name in fetched:
+                            continue
+                        status, body = await self._get(reader, writer, f'/hls/{name}', stats)
+                        fetched.add(name)
+                        if status == 200:
+                            stats.bytes += len(body)
+                            self._record_segment_lag(name, stats)
+                    await asyncio.sleep(target_duration / 2)
+            except asyncio.TimeoutError:
+                pass
+            except (OSError, ValueError, IndexError, asyncio.IncompleteReadError) as e:
+                stats.errors += 1
+                logger.debug(f"HLS client error: {e}")
+                await asyncio.sleep(0.5)
+            finally:
+                stats.active_time += time.monotonic() - connected
+                if writer:
+                    writer.close()
+
+    async def _get(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                   path: str, stats: ClientStats) -> Tuple[int, bytes]:
+        """Send a GET on a persistent connection and read the whole response."""
+        sent = time.monotonic()
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{self._port}\r\n{RECEIVER_HEADERS}\r\n'
+            .encode('ascii')
+        )
+        await writer.drain()
+        status, headers = await asyncio.wait_for(self._read_headers(reader), self._remaining())
+        stats.ttfb.append(time.monotonic() - sent)
+        length = int(headers.get('content-length', '0'))
+        body = await asyncio.wait_for(reader.readexactly(length), self._remaining())
+        if headers.get('connection', '').lower() == 'close':
+            raise ConnectionResetError("Server closed the connection")
+        return status, body
+
+    def _record_segment_lag(self, name: str, stats: ClientStats):
+        """Record how long ago a fetched HLS segment was completed."""
+        try:
+            finished = os.stat(os.path.join(self._hls_dir, name)).st_mtime
+        except OSError:
+            return
+        stats.lags.append(max(time.time() - finished, 0.0))
+
+def print_report(stats: List[ClientStats], elapsed: float, skips: Optional[int]):
+    """Print the load test results."""
+    total_bytes = sum(s.bytes for s in stats)
+    ttfb = [value for s in stats for value in s.ttfb]
+    lags = [value for s in stats for value in s.lags]
+    client_rates = [s.bytes * 8 / s.active_time / 1e6 for s in stats if s.active_time > 0]
+    worst_lags = [max(s.lags) for s in stats if s.lags]
+
+    print("\nתוצאות בדיקת עומס:")
+    print(f"לקוחות: {len(stats)}, חיבורים: {sum(s.connects for s in stats)}, "
+          f"שגיאות: {sum(s.errors for s in stats)}")
+    print(f"תפוקה כוללת: {total_bytes * 8 / elapsed / 1e6:.1f} Mbit/s "
+          f"({total_bytes / 1e6:.1f} MB ב-{elapsed:.1f} שניות)")
+    if client_rates:
+        print(f"תפוקה ללקוח: ממוצע {sum(client_rates) / len(client_rates):.2f} Mbit/s, "
+              f"מינימום {min(client_rates):.2f} Mbit/s")
+    print(f"זמן לבית ראשון: p50 {percentile(ttfb, 0.5) * 1000:.0f} ms, "
+          f"p99 {percentile(ttfb, 0.99) * 1000:.0f} ms")
+    print(f"פיגור מהשידור החי: p50 {percentile(lags, 0.5) * 1000:.0f} ms, "
+          f"p99 {percentile(lags, 0.99) * 1000:.0f} ms")
+    if worst_lags:
+        print(f"פיגור מרבי ללקוח: p50 {percentile(worst_lags, 0.5) * 1000:.0f} ms, "
+              f"הגרוע ביותר {max(worst_lags) * 1000:.0f} ms")
+    if skips is not None:
+        print(f"דילוגים לפריים מפתח: {skips}")
+
+def raise_file_limit():
+    """Raise the open file limit, since every client holds two sockets."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft != hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+def main():
+    parser = argparse.ArgumentParser(description="בדיקת עומס לשרת השידור של ManjCast")
+    parser.add_argument('--clients', type=int, default=100, help="מספר מקלטים מדומים")
+    parser.add_argument('--duration', type=float, default=30.0, help="משך הבדיקה בשניות")
+    parser.add_argument('--ramp', type=float, default=5.0, help="שניות לחיבור כל המקלטים")
+    parser.add_argument('--mode', choices=[OutputMode.FMP4.value, OutputMode.HLS.value],
+                        default=OutputMode.FMP4.value, help="מצב השידור")
+    parser.add_argument('--reconnect', type=float, default=0.0,
+                        help="זמן ממוצע בין התחברויות מחדש של מקלט (0 = ללא)")
+    parser.add_argument('--size', default='1280x720', help="גודל המקור הסינתטי")
+    parser.add_argument('--framerate', type=int, default=30, help="קצב פריימים")
+    parser.add_argument('--max-lag', type=float, default=3.0,
+                        help="פיגור מרבי לפני דילוג לפריים מפתח")
+    parser.add_argument('--verbose', action='store_true', help="הצג הודעות ניפוי")
+    args = parser.parse_args()
+
+    # Configure logging
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    raise_file_limit()
+
+    mode = OutputMode(args.mode)
+    process = None
+    stream_buffer = None
+    hls_dir = None
+    server = StreamServer(host='127.0.0.1', max_lag=args.max_lag)
+    try:
+        capture = ScreenCaptureManager(auto_tune=False)
+        capture.settings = {
+            'capture_type': 'synthetic',
+            'synthetic_size': args.size,
+            'framerate': args.framerate,
+            'output_mode': mode.value
+        }
+
+        print(f"מפעיל מקור סינתטי {args.size}@{args.framerate} במצב {mode.value}...")
+        if mode == OutputMode.FMP4:
+            process = capture.start_capture()
+            stream_buffer = TimedStreamBuffer()
+            stream_buffer.attach(process.stdout)
+            _, port = server.start(stream_buffer=stream_buffer)
+            ready = lambda: stream_buffer.is_ready
+        else:
+            hls_dir = tempfile.mkdtemp(prefix='manjcast_load_')
+            playlist = os.path.join(hls_dir, 'stream.m3u8')
+            process = capture.start_capture(playlist)
+            _, port = server.start(hls_dir=hls_dir)
+            ready = lambda: os.path.exists(playlist)
+
+        started = time.monotonic()
+        while not ready():
+            if process.poll() is not None or time.monotonic() - started > 15:
+                raise RuntimeError("המקור הסינתטי לא התחיל לשדר")
+            time.sleep(0.1)
+
+        print(f"מחבר {args.clients} מקלטים ל-127.0.0.1:{port} למשך {args.duration:.0f} שניות...")
+        simulator = ReceiverSimulator(
+            port, mode, args.duration, args.ramp, args.reconnect,
+            arrivals=stream_buffer.arrivals if stream_buffer else None,
+            hls_dir=hls_dir
+        )
+        started = time.monotonic()
+        stats = asyncio.run(simulator.run(args.clients))
+        elapsed = time.monotonic() - started
+        print_report(stats, elapsed, stream_buffer.skip_count if stream_buffer else None)
+
+    except KeyboardInterrupt:
+        print("\nהבדיקה הופסקה")
+    except Exception as e:
+        logger.error(f"שגיאה: {e}")
+        sys.exit(1)
+    finally:
+        server.stop()
+        if process:
+            capture.stop_capture(process)
+        if stream_buffer:
+            stream_buffer.close()
+        if hls_dir:
+            shutil.rmtree(hls_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -12,9 +12,9 @@ from PySide6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
     QComboBox, QPushButton, QLabel, QStatusBar,
     QMessageBox, QApplication, QRadioButton,
-    QButtonGroup, QGroupBox, QFrame
+    QButtonGroup, QGroupBox, QFrame, QCheckBox
 )
-from PySide6.QtCore import Qt, QTimer, Slot, QSize
+from PySide6.QtCore import Qt, QObject, Signal, Slot, QSize
 from PySide6.QtGui import QIcon, QColor, QFont
 from qt_material import apply_stylesheet, list_themes
 
@@ -33,6 +33,18 @@ class MaterialCard(QFrame):
         self.setProperty('class', 'material-card')
         self.setObjectName('material-card')
 
+class DeviceEvents(QObject):
+    """Carries device discovery changes from the discovery thread to the UI thread."""
+    added = Signal(dict)
+    updated = Signal(dict)
+    removed = Signal(str)
+    verified = Signal(dict, bool)
+
+class SessionEvents(QObject):
+    """Reports the outcome of a background session start to the UI thread."""
+    started = Signal()
+    failed = Signal(str)
+
 class MainWindow(QMainWindow):
     """Main window of the ManjCast application."""
     
@@ -111,7 +123,7 @@ class MainWindow(QMainWindow):
         self.refresh_button = QPushButton()
         self.refresh_button.setIcon(QIcon.fromTheme("view-refresh"))
         self.refresh_button.setIconSize(QSize(24, 24))
-        self.refresh_button.setToolTip("רענן רשימת התקנים")
+        self.refresh_button.setToolTip("חפש התקנים עכשיו")
         self.refresh_button.setFixedSize(48, 48)
         self.refresh_button.setStyleSheet("""
             QPushButton {
@@ -123,7 +135,7 @@ class MainWindow(QMainWindow):
                 background: #F1F3F4;
             }
         """)
-        self.refresh_button.clicked.connect(self._refresh_devices)
+        self.refresh_button.clicked.connect(self._rescan_devices)
         
         device_selector.addWidget(self.device_combo, 1)
         device_selector.addWidget(self.refresh_button)
@@ -157,9 +169,22 @@ class MainWindow(QMainWindow):
         self.capture_full.setChecked(True)
         self.capture_full.toggled.connect(self._capture_mode_changed)
         
+        self.monitor_combo = QComboBox()
+        self.monitor_combo.setMinimumHeight(40)
+        self.monitor_combo.setToolTip("בחר מסך לשידור")
+        self._populate_monitors()
+        
+        self.adaptive_framerate = QCheckBox("הורד קצב פריימים כשהמסך סטטי")
+        self.adaptive_framerate.setToolTip("חוסך מעבד ורוחב פס בשידור מצגות ולוחות מחוונים")
+        
         capture_layout.addWidget(self.capture_full)
+        capture_layout.addWidget(self.monitor_combo)
         capture_layout.addWidget(self.capture_window)
         capture_layout.addWidget(self.select_window_button)
+        capture_layout.addWidget(self.adaptive_framerate)
+        
+        self.capture_audio = QCheckBox("שדר גם את שמע המחשב")
+        capture_layout.addWidget(self.capture_audio)
         
         main_layout.addWidget(capture_card)
         
@@ -204,6 +229,20 @@ class MainWindow(QMainWindow):
         """)
         controls_layout.addWidget(self.stream_button)
         
+        # Extra devices can join or leave a running cast
+        devices_buttons = QHBoxLayout()
+        self.add_device_button = QPushButton("הוסף מכשיר לשידור")
+        self.add_device_button.setMinimumHeight(40)
+        self.add_device_button.setEnabled(False)
+        self.add_device_button.clicked.connect(self._add_device)
+        self.remove_device_button = QPushButton("הסר מכשיר מהשידור")
+        self.remove_device_button.setMinimumHeight(40)
+        self.remove_device_button.setEnabled(False)
+        self.remove_device_button.clicked.connect(self._remove_device)
+        devices_buttons.addWidget(self.add_device_button)
+        devices_buttons.addWidget(self.remove_device_button)
+        controls_layout.addLayout(devices_buttons)
+        
         main_layout.addWidget(controls_card)
         
         # Add stretcher to push everything up
@@ -226,61 +265,202 @@ class MainWindow(QMainWindow):
         # Connect signals
         self.device_combo.currentIndexChanged.connect(self._device_selected)
         
-        # Set up auto-refresh timer
-        self._refresh_timer = QTimer()
-        self._refresh_timer.timeout.connect(self._refresh_devices)
-        self._refresh_timer.start(30000)  # Refresh every 30 seconds
+        # Devices are discovered in the background; only changes reach the UI
+        self._device_events = DeviceEvents(self)
+        self._device_events.added.connect(self._device_added)
+        self._device_events.updated.connect(self._device_updated)
+        self._device_events.removed.connect(self._device_removed)
+        self._device_events.verified.connect(self._device_verified)
+        self._session_events = SessionEvents(self)
+        self._session_events.started.connect(self._streaming_started)
+        self._session_events.failed.connect(self._streaming_failed)
+        self._show_cached_devices()
+        self._start_device_discovery()
         
-        # Initial device scan
-        self._refresh_devices()
+        # Have an encoder ready before the first cast (if enabled)
+        self._streamer.prewarm()
     
-    @Slot()
-    def _refresh_devices(self):
-        """Refresh the list of available Cast devices."""
+    def _show_cached_devices(self):
+        """List the devices from the last session right away and check them in the background."""
+        try:
+            devices = self._streamer.cached_devices()
+        except Exception as e:
+            logger.warning(f"Could not load cached devices: {e}")
+            return
+        
+        for device in devices:
+            self._device_added(dict(device, cached=True))
+        if devices:
+            self.status_bar.showMessage(f"נטענו {len(devices)} התקנים שמורים, מאמת...")
+            self._streamer.revalidate_devices(devices, self._device_events.verified.emit)
+    
+    def _start_device_discovery(self):
+        """Start watching the network for Cast devices."""
         try:
+            self._streamer.watch_devices(
+                self._device_events.added.emit,
+                self._device_events.updated.emit,
+                self._device_events.removed.emit
+            )
             self.status_bar.showMessage("מחפש התקני Cast...")
-            self.refresh_button.setEnabled(False)
-            
-            # Clear current list
-            self.device_combo.clear()
-            self._devices.clear()
-            
-            # Get new device list
-            devices = self._streamer.discover_devices()
-            if not devices:
-                self.status_bar.showMessage("לא נמצאו התקני Cast")
-                return
-            
-            # Store devices and update combo box
-            self._devices = devices
-            for device in devices:
-                self.device_combo.addItem(
-                    f"{device['name']} ({device['ip_address']})", 
-                    userData=device
-                )
-            
-            self.status_bar.showMessage(f"נמצאו {len(devices)} התקני Cast")
-            
         except Exception as e:
-            logger.error(f"Error refreshing devices: {e}")
+            logger.error(f"Error starting device discovery: {e}")
             self.status_bar.showMessage("שגיאה בחיפוש התקנים")
             QMessageBox.critical(
                 self,
                 "שגיאה",
                 f"אירעה שגיאה בעת חיפוש התקנים:\n{str(e)}"
             )
-        finally:
-            self.refresh_button.setEnabled(True)
+    
+    @Slot()
+    def _rescan_devices(self):
+        """Query the network for Cast devices right away."""
+        self._streamer.rescan_devices()
+        self.status_bar.showMessage("מחפש התקני Cast...")
+    
+    def _find_device(self, uuid: str) -> int:
+        """Get the combo box index of a device, or -1 if it is not listed."""
+        for index, device in enumerate(self._devices):
+            if device['uuid'] == uuid:
+                return index
+        return -1
+    
+    @staticmethod
+    def _device_label(device: Dict) -> str:
+        """Get the combo box text of a device."""
+        label = f"{device['name']} ({device['ip_address']})"
+        if device.get('cached'):
+            label += " - לא מאומת"
+        return label
+    
+    @Slot(dict)
+    def _device_added(self, device: Dict):
+        """Add a newly discovered device to the list."""
+        if self._find_device(device['uuid']) >= 0:
+            self._device_updated(device)
+            return
+        self._devices.append(device)
+        self.device_combo.addItem(self._device_label(device), userData=device)
+        self.status_bar.showMessage(f"נמצא התקן {device['name']} ({len(self._devices)} התקני Cast)")
+    
+    @Slot(dict)
+    def _device_updated(self, device: Dict):
+        """Refresh a listed device whose name or address changed."""
+        index = self._find_device(device['uuid'])
+        if index < 0:
+            self._device_added(device)
+            return
+        self._devices[index] = device
+        self.device_combo.setItemText(index, self._device_label(device))
+        self.device_combo.setItemData(index, device)
+    
+    @Slot(str)
+    def _device_removed(self, uuid: str):
+        """Remove a device that left the network."""
+        index = self._find_device(uuid)
+        if index < 0:
+            return
+        device = self._devices.pop(index)
+        self.device_combo.removeItem(index)
+        self.status_bar.showMessage(f"ההתקן {device['name']} אינו זמין")
+        self._update_device_buttons()
+    
+    @Slot(dict, bool)
+    def _device_verified(self, device: Dict, reachable: bool):
+        """Confirm or drop a device listed from the cache."""
+        index = self._find_device(device['uuid'])
+        # Devices the discovery already reported are up to date
+        if index < 0 or not self._devices[index].get('cached'):
+            return
+        if reachable:
+            self._device_updated(device)
+        else:
+            self._device_removed(device['uuid'])
+    
+    def _populate_monitors(self):
+        """Fill the monitor selector with the connected monitors."""
+        self.monitor_combo.clear()
+        try:
+            monitors = self._streamer.list_monitors()
+        except Exception as e:
+            logger.warning(f"Could not list monitors: {e}")
+            monitors = []
+        
+        for monitor in monitors:
+            label = f"{monitor['name']} ({monitor['width']}x{monitor['height']})"
+            if monitor['primary']:
+                label += " - ראשי"
+            self.monitor_combo.addItem(label, userData=monitor['name'])
+            if monitor['primary']:
+                self.monitor_combo.setCurrentIndex(self.monitor_combo.count() - 1)
+        
+        # Nothing to choose with a single monitor
+        self.monitor_combo.setVisible(len(monitors) > 1)
     
     @Slot(int)
     def _device_selected(self, index: int):
         """Handle device selection from combo box."""
-        self.stream_button.setEnabled(index >= 0)
+        self.stream_button.setEnabled(index >= 0 or self._streamer.is_streaming)
+        self._update_device_buttons()
+    
+    def _update_device_buttons(self):
+        """Enable adding or removing the selected device while casting."""
+        index = self.device_combo.currentIndex()
+        streaming = self._streamer.is_streaming
+        in_session = (
+            index >= 0 and self._devices[index]['uuid'] in self._streamer.active_devices
+        )
+        self.add_device_button.setEnabled(streaming and index >= 0 and not in_session)
+        self.remove_device_button.setEnabled(streaming and in_session)
+    
+    @Slot()
+    def _add_device(self):
+        """Add the selected device to the running cast."""
+        index = self.device_combo.currentIndex()
+        if index < 0:
+            return
+        
+        device = self._devices[index]
+        try:
+            self.status_bar.showMessage(f"מתחבר להתקן {device['name']}...")
+            if not self._streamer.add_device(device):
+                raise RuntimeError(f"לא ניתן להתחבר להתקן {device['name']}")
+            self.status_bar.showMessage(
+                f"משדר ל-{len(self._streamer.active_devices)} מכשירים"
+            )
+        except Exception as e:
+            logger.error(f"Error adding device: {e}")
+            self.status_bar.showMessage("שגיאה בהוספת המכשיר")
+            QMessageBox.critical(
+                self,
+                "שגיאה",
+                f"אירעה שגיאה בהוספת המכשיר:\n{str(e)}"
+            )
+        finally:
+            self._update_device_buttons()
+    
+    @Slot()
+    def _remove_device(self):
+        """Remove the selected device from the running cast."""
+        index = self.device_combo.currentIndex()
+        if index < 0:
+            return
+        
+        self._streamer.remove_device(self._devices[index]['uuid'])
+        if self._streamer.is_streaming:
+            self.status_bar.showMessage(
+                f"משדר ל-{len(self._streamer.active_devices)} מכשירים"
+            )
+            self._update_device_buttons()
+        else:
+            # The last device left, so the cast has ended
+            self._stop_streaming()
     
     @Slot(bool)
     def _capture_mode_changed(self, checked: bool):
         """Handle capture mode radio button changes."""
         self.select_window_button.setEnabled(self.capture_window.isChecked())
+        self.monitor_combo.setEnabled(self.capture_full.isChecked())
         if self.capture_full.isChecked():
             self._selected_window_id = None
     
@@ -308,11 +488,6 @@ class MainWindow(QMainWindow):
                 return
             
             device = self._devices[index]
-            self.status_bar.showMessage(f"מתחבר להתקן {device['name']}...")
-            
-            # Connect to device
-            if not self._streamer.select_device(device):
-                raise RuntimeError(f"לא ניתן להתחבר להתקן {device['name']}")
             
             # Verify window selection if needed
             if self.capture_window.isChecked() and not self._selected_window_id:
@@ -322,30 +497,56 @@ class MainWindow(QMainWindow):
             capture_settings = {
                 'capture_type': 'fullscreen' if self.capture_full.isChecked() else 'window',
                 'window_id': self._selected_window_id,
+                'monitor': self.monitor_combo.currentData(),
+                'adaptive_framerate': self.adaptive_framerate.isChecked(),
+                'audio': self.capture_audio.isChecked(),
                 'receiver_id': 'C0868879'  # Use Google's sample receiver app
             }
             self._streamer.settings = capture_settings
             
-            # Start streaming
-            self._streamer.start_streaming()
-            
-            # Update UI
-            self.stream_button.setText("עצור שידור")
-            self.device_combo.setEnabled(False)
-            self.refresh_button.setEnabled(False)
-            self.capture_full.setEnabled(False)
-            self.capture_window.setEnabled(False)
-            self.select_window_button.setEnabled(False)
-            self.status_bar.showMessage(f"משדר למכשיר {device['name']}")
+            # Connect and start streaming in the background; the outcome arrives as a signal
+            future = self._streamer.start_streaming_async(device)
+            self.stream_button.setEnabled(False)
+            self.status_bar.showMessage(f"מתחבר ומתחיל שידור למכשיר {device['name']}...")
+            future.add_done_callback(self._session_start_done)
             
         except Exception as e:
-            logger.error(f"Error starting stream: {e}")
-            self.status_bar.showMessage("שגיאה בהתחלת השידור")
-            QMessageBox.critical(
-                self,
-                "שגיאה",
-                f"אירעה שגיאה בהתחלת השידור:\n{str(e)}"
-            )
+            self._streaming_failed(str(e))
+    
+    def _session_start_done(self, future):
+        """Forward the outcome of a session start from its worker thread."""
+        error = future.exception()
+        if error:
+            self._session_events.failed.emit(str(error))
+        else:
+            self._session_events.started.emit()
+    
+    @Slot()
+    def _streaming_started(self):
+        """Update the UI once the receiver plays the stream."""
+        self.stream_button.setEnabled(True)
+        self.stream_button.setText("עצור שידור")
+        self.refresh_button.setEnabled(False)
+        self._update_device_buttons()
+        self.capture_full.setEnabled(False)
+        self.capture_window.setEnabled(False)
+        self.select_window_button.setEnabled(False)
+        self.monitor_combo.setEnabled(False)
+        self.adaptive_framerate.setEnabled(False)
+        self.capture_audio.setEnabled(False)
+        self.status_bar.showMessage(f"משדר למכשיר {self._streamer.current_device}")
+    
+    @Slot(str)
+    def _streaming_failed(self, message: str):
+        """Report a session that could not be started."""
+        logger.error(f"Error starting stream: {message}")
+        self.stream_button.setEnabled(self.device_combo.currentIndex() >= 0)
+        self.status_bar.showMessage("שגיאה בהתחלת השידור")
+        QMessageBox.critical(
+            self,
+            "שגיאה",
+            f"אירעה שגיאה בהתחלת השידור:\n{message}"
+        )
     
     def _stop_streaming(self):
         """Stop current streaming session."""
@@ -354,11 +555,14 @@ class MainWindow(QMainWindow):
             
             # Update UI
             self.stream_button.setText("התחל שידור")
-            self.device_combo.setEnabled(True)
             self.refresh_button.setEnabled(True)
+            self._update_device_buttons()
             self.capture_full.setEnabled(True)
             self.capture_window.setEnabled(True)
             self.select_window_button.setEnabled(self.capture_window.isChecked())
+            self.monitor_combo.setEnabled(self.capture_full.isChecked())
+            self.adaptive_framerate.setEnabled(True)
+            self.capture_audio.setEnabled(True)
             self.status_bar.showMessage("השידור נעצר")
             
         except Exception as e:
@@ -374,4 +578,5 @@ class MainWindow(QMainWindow):
         """Handle window close event."""
         if self._streamer.is_streaming:
             self._stop_streaming()
+        self._streamer.stop_watching_devices()
         event.accept()
\ No newline at end of file
@@ -0,0 +1,9 @@
+"""
+Test configuration for ManjCast.
+Makes the packages under src importable without installing them.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
@@ -0,0 +1,143 @@
+"""
+Tests for the session supervisor of ManjCast.
+"""
+
+import threading
+import time
+
+from manjcast.core.session_supervisor import SessionSupervisor
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+class FakeComponent:
+    """A component whose health is set by the test, counting its recoveries."""
+
+    def __init__(self, clock: FakeClock, healthy: bool = True):
+        self.clock = clock
+        self.healthy = healthy
+        self.recoveries = []
+
+    def check(self):
+        return None if self.healthy else "broken"
+
+    def recover(self):
+        self.recoveries.append(self.clock.now)
+
+def make_supervisor(clock: FakeClock, **options) -> SessionSupervisor:
+    options.setdefault('initial_backoff', 1.0)
+    options.setdefault('max_backoff', 30.0)
+    options.setdefault('stable_period', 10.0)
+    return SessionSupervisor(clock=clock, **options)
+
+def run_until(supervisor: SessionSupervisor, clock: FakeClock, end: float, step: float = 0.5):
+    while clock.now <= end:
+        supervisor.check_once()
+        clock.now += step
+
+def test_backoff_doubles_between_recoveries():
+    clock = FakeClock()
+    supervisor = make_supervisor(clock)
+    component = FakeComponent(clock, healthy=False)
+    supervisor.watch('encoder', component.check, component.recover)
+
+    run_until(supervisor, clock, 16.0)
+    assert component.recoveries == [0.0, 1.0, 3.0, 7.0, 15.0]
+    assert supervisor.failures == {'encoder': 5}
+
+def test_backoff_is_capped():
+    clock = FakeClock()
+    supervisor = make_supervisor(clock, max_backoff=4.0)
+    component = FakeComponent(clock, healthy=False)
+    supervisor.watch('encoder', component.check, component.recover)
+
+    run_until(supervisor, clock, 20.0)
+    assert component.recoveries == [0.0, 1.0, 3.0, 7.0, 11.0, 15.0, 19.0]
+
+def test_backoff_resets_after_stable_period():
+    clock = FakeClock()
+    supervisor = make_supervisor(clock)
+    component = FakeComponent(clock, healthy=False)
+    supervisor.watch('encoder', component.check, component.recover)
+    run_until(supervisor, clock, 3.0)
+    assert supervisor.failures == {'encoder': 3}
+
+    component.healthy = True
+    run_until(supervisor, clock, 12.0)
+    assert supervisor.failures == {'encoder': 3}
+    run_until(supervisor, clock, 14.0)
+    assert supervisor.failures == {'encoder': 0}
+
+    # The next failure starts over at the initial backoff
+    component.healthy = False
+    component.recoveries.clear()
+    run_until(supervisor, clock, 17.0)
+    assert component.recoveries == [14.5, 15.5]
+
+def test_short_recovery_keeps_backoff():
+    clock = FakeClock()
+    supervisor = make_supervisor(clock)
+    component = FakeComponent(clock, healthy=False)
+    supervisor.watch('encoder', component.check, component.recover)
+    run_until(supervisor, clock, 3.0)
+
+    component.healthy = True
+    run_until(supervisor, clock, 5.0)
+    component.healthy = False
+    component.recoveries.clear()
+    run_until(supervisor, clock, 13.0)
+    # The backoff goes on from where it was: 4s after the attempt at 3s
+    assert component.recoveries == [7.0]
+    assert supervisor.failures == {'encoder': 4}
+
+def test_only_failed_component_is_recovered():
+    clock = FakeClock()
+    supervisor = make_supervisor(clock)
+    encoder = FakeComponent(clock)
+    server = FakeComponent(clock, healthy=False)
+    supervisor.watch('encoder', encoder.check, encoder.recover)
+    supervisor.watch('stream server', server.check, server.recover)
+
+    run_until(supervisor, clock, 1.0)
+    assert encoder.recoveries == []
+    assert server.recoveries == [0.0, 1.0]
+    assert supervisor.failures == {'encoder': 0, 'stream server': 2}
+
+def test_failing_check_and_recovery_are_contained():
+    clock = FakeClock()
+    supervisor = make_supervisor(clock)
+    recoveries = []
+
+    def check():
+        raise OSError("gone")
+
+    def recover():
+        recoveries.append(clock.now)
+        raise RuntimeError("still gone")
+
+    supervisor.watch('receiver', check, recover)
+    run_until(supervisor, clock, 3.0)
+    assert recoveries == [0.0, 1.0, 3.0]
+
+def test_stop_does_not_wait_for_a_running_recovery():
+    release = threading.Event()
+    recovering = threading.Event()
+
+    def recover():
+        recovering.set()
+        release.wait(5)
+
+    supervisor = SessionSupervisor(interval=0.01)
+    supervisor.watch('receiver', lambda: "broken", recover)
+    supervisor.start()
+    assert recovering.wait(2)
+
+    started = time.monotonic()
+    supervisor.stop(timeout=0.1)
+    assert time.monotonic() - started < 1.0
+    assert supervisor.stopping
+    release.set()
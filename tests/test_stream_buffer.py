@@ -0,0 +1,103 @@
+"""
+Tests for the in-memory stream buffer of ManjCast.
+"""
+
+import struct
+
+from manjcast.core.stream_buffer import StreamBuffer
+
+def box(box_type: bytes, payload: bytes = b'') -> bytes:
+    return struct.pack('>I4s', 8 + len(payload), box_type) + payload
+
+def fragment(keyframe: bool, size: int = 100) -> bytes:
+    """Build a one-sample moof/mdat fragment with explicit first-sample flags."""
+    tfhd = box(b'tfhd', struct.pack('>III', 0x20, 1, 0x01010000))
+    first_sample_flags = 0x02000000 if keyframe else 0x01010000
+    trun = box(b'trun', struct.pack('>IIIII', 0x205, 1, 0, first_sample_flags, size))
+    return box(b'moof', box(b'mfhd', b'\0' * 8) + box(b'traf', tfhd + trun)) + box(b'mdat', b'x' * size)
+
+def make_buffer(keyframes, max_bytes: int = 1024 * 1024) -> StreamBuffer:
+    stream_buffer = StreamBuffer(max_bytes=max_bytes)
+    stream_buffer.set_init_segment(b'init')
+    for keyframe in keyframes:
+        stream_buffer.append(fragment(keyframe))
+    return stream_buffer
+
+def test_new_reader_waits_for_a_keyframe():
+    stream_buffer = make_buffer([False])
+    assert stream_buffer.read_fragment(None, max_lag=3.0, timeout=0.01) is None
+
+def test_new_reader_joins_at_newest_keyframe_with_init_segment():
+    stream_buffer = make_buffer([True, False, True, False])
+    read = stream_buffer.read_fragment(None, max_lag=3.0, timeout=0)
+    assert read.init_segment == b'init'
+    assert read.fragment.sequence == 2
+    assert read.skipped == 0
+
+def test_reader_follows_the_stream_in_order():
+    stream_buffer = make_buffer([True, False, False])
+    read = stream_buffer.read_fragment(1, max_lag=3.0, timeout=0)
+    assert read.init_segment is None
+    assert read.fragment.sequence == 1
+    assert stream_buffer.read_fragment(3, max_lag=3.0, timeout=0.01) is None
+
+def test_lagging_reader_skips_to_newest_keyframe():
+    stream_buffer = make_buffer([True, False, True, False])
+    read = stream_buffer.read_fragment(1, max_lag=-1.0, timeout=0)
+    assert read.fragment.sequence == 2
+    assert read.skipped == 1
+    assert stream_buffer.skip_count == 1
+
+def test_evicted_reader_skips_to_newest_keyframe():
+    # Each fragment is over 100 bytes, so only the newest GOP fits
+    stream_buffer = make_buffer([True, False, True, False], max_bytes=300)
+    read = stream_buffer.read_fragment(0, max_lag=3.0, timeout=0)
+    assert read.fragment.sequence == 2
+    assert read.lag is None
+
+def test_closed_buffer_returns_nothing():
+    stream_buffer = make_buffer([True])
+    stream_buffer.close()
+    assert stream_buffer.read_fragment(None, max_lag=3.0, timeout=0) is None
+
+def test_iter_stream_yields_init_then_fragments():
+    stream_buffer = make_buffer([True, False])
+    reader = iter(stream_buffer.iter_stream())
+    assert next(reader) == b'init'
+    assert next(reader) == fragment(True)
+    stream_buffer.append(fragment(False))
+    assert next(reader) == fragment(False)
+    stream_buffer.close()
+
+def test_reading_reader_gets_new_init_segment_on_format_change():
+    stream_buffer = make_buffer([True, False])
+    read = stream_buffer.read_fragment(None, max_lag=3.0, timeout=0)
+    read = stream_buffer.read_fragment(read.fragment.sequence + 1, max_lag=3.0, timeout=0,
+                                       generation=read.generation)
+    assert read.init_segment is None
+
+    stream_buffer._replace_init_segment(b'new init')
+    stream_buffer.append(fragment(False, size=50))
+    # Fragments of the new format can't be decoded before its keyframe arrives
+    assert stream_buffer.read_fragment(read.fragment.sequence + 1, max_lag=3.0, timeout=0.01,
+                                       generation=read.generation) is None
+    stream_buffer.append(fragment(True, size=60))
+    changed = stream_buffer.read_fragment(read.fragment.sequence + 1, max_lag=3.0, timeout=0,
+                                          generation=read.generation)
+    assert changed.init_segment == b'new init'
+    assert changed.fragment.data == fragment(True, size=60)
+    assert changed.generation != read.generation
+
+def test_iter_stream_resends_init_segment_on_format_change():
+    stream_buffer = make_buffer([True])
+    reader = iter(stream_buffer.iter_stream())
+    assert next(reader) == b'init'
+    assert next(reader) == fragment(True)
+
+    stream_buffer._replace_init_segment(b'new init')
+    stream_buffer.append(fragment(True, size=60))
+    stream_buffer.append(fragment(False, size=60))
+    assert next(reader) == b'new init'
+    assert next(reader) == fragment(True, size=60)
+    assert next(reader) == fragment(False, size=60)
+    stream_buffer.close()
@@ -0,0 +1,46 @@
+"""
+Tests for the byte range parsing of the ManjCast stream server.
+"""
+
+import pytest
+
+from manjcast.core.stream_server import RangeNotSatisfiable, parse_byte_range
+
+def test_closed_range():
+    assert parse_byte_range('bytes=0-1023', 4096) == (0, 1023)
+
+def test_closed_range_is_clamped_to_file():
+    assert parse_byte_range('bytes=100-99999', 4096) == (100, 4095)
+
+def test_open_ended_range():
+    assert parse_byte_range('bytes=1000-', 4096) == (1000, 4095)
+
+def test_suffix_range():
+    assert parse_byte_range('bytes=-500', 4096) == (3596, 4095)
+
+def test_suffix_range_longer_than_file():
+    assert parse_byte_range('bytes=-10000', 4096) == (0, 4095)
+
+def test_zero_suffix_is_not_satisfiable():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range('bytes=-0', 4096)
+
+def test_inverted_range_is_not_satisfiable():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range('bytes=500-100', 4096)
+
+def test_range_past_end_is_not_satisfiable():
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range('bytes=4096-', 4096)
+
+@pytest.mark.parametrize('header', ['bytes=-5', 'bytes=0-', 'bytes=0-10'])
+def test_zero_length_file_is_not_satisfiable(header):
+    with pytest.raises(RangeNotSatisfiable):
+        parse_byte_range(header, 0)
+
+@pytest.mark.parametrize('header', ['items=0-10', 'bytes=0-10,20-30', 'bytes=abc', 'bytes=a-b'])
+def test_unsupported_headers_are_ignored(header):
+    assert parse_byte_range(header, 4096) is None
+
+def test_malformed_header_on_empty_file_is_ignored():
+    assert parse_byte_range('bytes=a-b', 0) is None